@@ -0,0 +1,277 @@
+# app/db/analytics.py
+
+from abc import ABC, abstractmethod
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+from pymongo import UpdateOne
+from app.db.repository import STORAGE_BACKEND, notes_repository
+
+# Content length (characters) bucket edges: <100, 100-1k, 1k-10k, 10k+
+SIZE_BUCKETS = [(100, "<100"), (1000, "100-1k"), (10000, "1k-10k")]
+LARGEST_SIZE_BUCKET = "10k+"
+
+# (kind, key, field) -> delta, kind is "day", "tag" or "size"
+Increments = Dict[Tuple[str, str, str], int]
+
+# Fields that describe current state and can be recomputed exactly; every
+# other field (created/updated/deleted) counts events and is history
+GAUGE_FIELDS = {"notes"}
+
+
+def size_bucket(content: str) -> str:
+    length = len(content or "")
+    for upper, label in SIZE_BUCKETS:
+        if length < upper:
+            return label
+    return LARGEST_SIZE_BUCKET
+
+
+def day_key(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d")
+
+
+def rollup_increments(previous: Optional[dict], current: Optional[dict]) -> Increments:
+    """Counter changes for one write: create (None, doc), update (old, new)
+    or delete (doc, None).
+
+    Day buckets count created/updated/deleted events. Tag and size buckets
+    count created/updated events plus `notes`, the number of live notes
+    currently in the bucket. Every update event is counted, so a note
+    edited three times adds 3 to `updated`.
+    """
+    increments = Counter()
+    if current is not None:
+        event = "created" if previous is None else "updated"
+        moment = current["created_at"] if previous is None else current["updated_at"]
+        increments[("day", day_key(moment), event)] += 1
+        for tag in set(current.get("tags") or []):
+            increments[("tag", tag, event)] += 1
+            increments[("tag", tag, "notes")] += 1
+        bucket = size_bucket(current.get("content", ""))
+        increments[("size", bucket, event)] += 1
+        increments[("size", bucket, "notes")] += 1
+    elif previous is not None:
+        increments[("day", day_key(datetime.utcnow()), "deleted")] += 1
+
+    if previous is not None:
+        for tag in set(previous.get("tags") or []):
+            increments[("tag", tag, "notes")] -= 1
+        increments[("size", size_bucket(previous.get("content", "")), "notes")] -= 1
+
+    return {key: delta for key, delta in increments.items() if delta}
+
+
+def rollups_from_notes(notes: Iterable[dict]) -> Increments:
+    """Rollups derivable from the notes themselves: exact `notes` gauges,
+    plus event counters approximated from timestamps (one creation per note,
+    at most one update, no deletions) for seeding buckets with no history."""
+    totals = Counter()
+    for note in notes:
+        totals.update(rollup_increments(None, note))
+        if note["updated_at"] > note["created_at"]:
+            totals[("day", day_key(note["updated_at"]), "updated")] += 1
+            for tag in set(note.get("tags") or []):
+                totals[("tag", tag, "updated")] += 1
+            totals[("size", size_bucket(note.get("content", "")), "updated")] += 1
+    return dict(totals)
+
+
+def rollups_from_facet(result: dict) -> Increments:
+    """`rollups_from_notes`, computed from the output of
+    MongoRollupStore's rebuild pipeline instead of the notes."""
+    rollups = {}
+    for row in result["created"]:
+        rollups[("day", row["_id"], "created")] = row["count"]
+    for row in result["updated"]:
+        rollups[("day", row["_id"], "updated")] = row["count"]
+    for kind, section in (("tag", "tags"), ("size", "sizes")):
+        for row in result[section]:
+            rollups[(kind, row["_id"], "notes")] = row["notes"]
+            rollups[(kind, row["_id"], "created")] = row["notes"]
+            if row["updated"]:
+                rollups[(kind, row["_id"], "updated")] = row["updated"]
+    return rollups
+
+
+def plan_rebuild(rebuilt: Increments, current: Dict[Tuple[str, str], dict]) -> Tuple[Increments, Increments]:
+    """Turn freshly derived rollups into (gauge corrections, event seeds).
+
+    Gauge corrections are deltas to add to the live `notes` counters, so
+    increments recorded while the rebuild runs are kept rather than
+    overwritten. Event seeds only fill counters a bucket has never had.
+    """
+    corrections = Counter()
+    for (kind, key), counters in current.items():
+        for field in GAUGE_FIELDS & counters.keys():
+            corrections[(kind, key, field)] -= counters[field]
+    seeds = {}
+    for (kind, key, field), value in rebuilt.items():
+        if field in GAUGE_FIELDS:
+            corrections[(kind, key, field)] += value
+        elif field not in current.get((kind, key), {}):
+            seeds[(kind, key, field)] = value
+    return {key: delta for key, delta in corrections.items() if delta}, seeds
+
+
+def format_rollups(rows: Iterable[Tuple[str, str, dict]], since_day: str) -> dict:
+    """Shape (kind, key, counters) rows into the analytics response."""
+    result = {"days": [], "tags": [], "sizes": []}
+    labels = {"day": ("days", "day"), "tag": ("tags", "tag"), "size": ("sizes", "bucket")}
+    for kind, key, counters in rows:
+        if kind == "day" and key < since_day:
+            continue
+        section, label = labels[kind]
+        row = {label: key}
+        row.update(counters)
+        result[section].append(row)
+    result["days"].sort(key=lambda row: row["day"])
+    result["tags"].sort(key=lambda row: (-row.get("notes", 0), row["tag"]))
+    order = [label for _, label in SIZE_BUCKETS] + [LARGEST_SIZE_BUCKET]
+    result["sizes"].sort(key=lambda row: order.index(row["bucket"]))
+    return result
+
+
+def _day_string(field: str) -> dict:
+    return {"$dateToString": {"format": "%Y-%m-%d", "date": f"${field}"}}
+
+
+class RollupStore(ABC):
+    """Incrementally maintained activity counters behind GET /notes/analytics.
+
+    `rebuild` repairs the `notes` gauges from the notes themselves. Event
+    counters are history the notes no longer hold, so a rebuild keeps them
+    and only seeds those a bucket has never recorded (e.g. after the
+    rollups were lost).
+    """
+
+    async def record(self, previous: Optional[dict], current: Optional[dict]):
+        increments = rollup_increments(previous, current)
+        if increments:
+            await self.apply(increments)
+
+    async def read(self, days: int = 30) -> dict:
+        since_day = day_key(datetime.utcnow() - timedelta(days=days - 1))
+        return format_rollups(await self.rows(since_day), since_day)
+
+    @abstractmethod
+    async def apply(self, increments: Increments):
+        ...
+
+    @abstractmethod
+    async def rows(self, since_day: str):
+        """(kind, key, counters) for every tag/size bucket and recent days."""
+
+    @abstractmethod
+    async def rebuild(self):
+        """Correct gauges and seed missing event counters from the notes."""
+
+
+class InMemoryRollupStore(RollupStore):
+    def __init__(self, repository):
+        self.repository = repository
+        self._counters: Dict[Tuple[str, str], Counter] = {}
+
+    async def apply(self, increments: Increments):
+        for (kind, key, field), delta in increments.items():
+            counters = self._counters.setdefault((kind, key), Counter())
+            counters[field] += delta
+
+    async def rows(self, since_day: str):
+        return [(kind, key, dict(counters)) for (kind, key), counters in self._counters.items()]
+
+    async def rebuild(self):
+        # No awaits between reading the notes and applying the plan, so no
+        # concurrent write can slip in between
+        notes = [note async for note in self.repository.iter_notes(include_archived=True)]
+        current = {bucket: dict(counters) for bucket, counters in self._counters.items()}
+        corrections, seeds = plan_rebuild(rollups_from_notes(notes), current)
+        await self.apply(corrections)
+        for (kind, key, field), value in seeds.items():
+            self._counters.setdefault((kind, key), Counter())[field] = value
+
+
+class MongoRollupStore(RollupStore):
+    """One document per (kind, key) in `note_rollups`, updated with $inc."""
+
+    def __init__(self, db, notes_collection, archive_collection):
+        self.db = db
+        self.notes = notes_collection
+        self.archive = archive_collection
+        self.collection = db["note_rollups"]
+
+    async def apply(self, increments: Increments):
+        grouped: Dict[Tuple[str, str], dict] = {}
+        for (kind, key, field), delta in increments.items():
+            grouped.setdefault((kind, key), {})[field] = delta
+        await self.collection.bulk_write([
+            UpdateOne({"_id": f"{kind}:{key}"},
+                      {"$set": {"kind": kind, "key": key}, "$inc": fields},
+                      upsert=True)
+            for (kind, key), fields in grouped.items()
+        ], ordered=False)
+
+    async def rows(self, since_day: str):
+        cursor = self.collection.find({"$or": [
+            {"kind": {"$in": ["tag", "size"]}},
+            {"kind": "day", "key": {"$gte": since_day}},
+        ]})
+        rows = []
+        async for doc in cursor:
+            counters = {k: v for k, v in doc.items() if k not in ("_id", "kind", "key")}
+            rows.append((doc["kind"], doc["key"], counters))
+        return rows
+
+    def _rebuild_pipeline(self):
+        was_updated = {"$cond": [{"$gt": ["$updated_at", "$created_at"]}, 1, 0]}
+        length = {"$strLenCP": {"$ifNull": ["$content", ""]}}
+        size = {"$switch": {
+            "branches": [{"case": {"$lt": [length, upper]}, "then": label} for upper, label in SIZE_BUCKETS],
+            "default": LARGEST_SIZE_BUCKET,
+        }}
+        # Archived notes are still live notes as far as analytics go
+        return [{"$unionWith": self.archive.name}, {"$facet": {
+            "created": [{"$group": {"_id": _day_string("created_at"), "count": {"$sum": 1}}}],
+            "updated": [
+                {"$match": {"$expr": {"$gt": ["$updated_at", "$created_at"]}}},
+                {"$group": {"_id": _day_string("updated_at"), "count": {"$sum": 1}}},
+            ],
+            "tags": [
+                {"$project": {"tags": {"$setUnion": [{"$ifNull": ["$tags", []]}, []]}, "updated": was_updated}},
+                {"$unwind": "$tags"},
+                {"$group": {"_id": "$tags", "notes": {"$sum": 1}, "updated": {"$sum": "$updated"}}},
+            ],
+            "sizes": [
+                {"$group": {"_id": size, "notes": {"$sum": 1}, "updated": {"$sum": was_updated}}},
+            ],
+        }}]
+
+    async def rebuild(self):
+        result = (await self.notes.aggregate(self._rebuild_pipeline()).to_list(length=1))[0]
+        rebuilt = rollups_from_facet(result)
+
+        # Gauges are corrected with $inc rather than overwritten, so writes
+        # recorded during the rebuild are kept; a write in flight while the
+        # notes and rollups are being read can still be off by its own delta
+        current = {(kind, key): counters for kind, key, counters in await self.rows("")}
+        corrections, seeds = plan_rebuild(rebuilt, current)
+        if corrections:
+            await self.apply(corrections)
+        if seeds:
+            operations = []
+            for (kind, key, field), value in seeds.items():
+                operations.append(UpdateOne({"_id": f"{kind}:{key}"},
+                                            {"$setOnInsert": {"kind": kind, "key": key}}, upsert=True))
+                operations.append(UpdateOne({"_id": f"{kind}:{key}", field: {"$exists": False}},
+                                            {"$set": {field: value}}))
+            await self.collection.bulk_write(operations)
+
+
+def get_rollup_store(backend: str = STORAGE_BACKEND) -> RollupStore:
+    if backend == "memory":
+        return InMemoryRollupStore(notes_repository)
+    from app.db.mongo import db, notes_archive_collection, notes_collection
+    return MongoRollupStore(db, notes_collection, notes_archive_collection)
+
+
+rollup_store = get_rollup_store()
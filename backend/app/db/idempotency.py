@@ -0,0 +1,133 @@
+# app/db/idempotency.py
+
+import os
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+from app.db.repository import STORAGE_BACKEND
+
+# How long a key (and its stored response) is remembered
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 60 * 60)))
+# How long an unfinished claim blocks retries before another request may take it over
+IDEMPOTENCY_LOCK_TIMEOUT_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT_SECONDS", "30"))
+
+
+class IdempotencyStore(ABC):
+    """Remembers the response for each Idempotency-Key.
+
+    A record is {"key", "fingerprint", "created_at", "claimed_at",
+    "status_code", "body"}; status_code/body stay None while the first
+    request is still running. A claim left unfinished for longer than the
+    lock timeout (e.g. its process died) can be taken over by a retry.
+    """
+
+    async def ensure_indexes(self):
+        """Create whatever indexes the backend needs (called at startup)."""
+
+    @abstractmethod
+    async def claim(self, key: str, fingerprint: str) -> Optional[dict]:
+        """Atomically reserve `key` (or take over an expired claim). Returns
+        None if this caller now owns it, otherwise the existing record."""
+
+    @abstractmethod
+    async def complete(self, key: str, status_code: int, body):
+        ...
+
+    @abstractmethod
+    async def release(self, key: str):
+        """Drop an unfinished claim so the client can retry."""
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    def __init__(self, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS,
+                 lock_timeout_seconds: int = IDEMPOTENCY_LOCK_TIMEOUT_SECONDS):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.lock_timeout = timedelta(seconds=lock_timeout_seconds)
+        # Insertion order is expiry order, since every key gets the same TTL
+        self._records: "OrderedDict[str, dict]" = OrderedDict()
+
+    def _expire(self, now: datetime):
+        while self._records:
+            key, record = next(iter(self._records.items()))
+            if record["created_at"] + self.ttl > now:
+                break
+            del self._records[key]
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[dict]:
+        now = datetime.utcnow()
+        self._expire(now)
+        existing = self._records.get(key)
+        if existing is not None:
+            if existing["status_code"] is not None or existing["claimed_at"] + self.lock_timeout > now:
+                return dict(existing)
+            # Abandoned claim: start over as a fresh record
+            del self._records[key]
+        self._records[key] = {"key": key, "fingerprint": fingerprint, "created_at": now,
+                              "claimed_at": now, "status_code": None, "body": None}
+        return None
+
+    async def complete(self, key: str, status_code: int, body):
+        record = self._records.get(key)
+        if record is not None:
+            record.update(status_code=status_code, body=body)
+
+    async def release(self, key: str):
+        record = self._records.get(key)
+        if record is not None and record["status_code"] is None:
+            del self._records[key]
+
+
+class MongoIdempotencyStore(IdempotencyStore):
+    """`idempotency_keys` collection: the unique index on `key` settles
+    concurrent duplicates, the TTL index on `created_at` expires them."""
+
+    def __init__(self, collection, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS,
+                 lock_timeout_seconds: int = IDEMPOTENCY_LOCK_TIMEOUT_SECONDS):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.lock_timeout = timedelta(seconds=lock_timeout_seconds)
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("key", ASCENDING)], unique=True)
+        await self.collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[dict]:
+        now = datetime.utcnow()
+        try:
+            await self.collection.insert_one({"key": key, "fingerprint": fingerprint,
+                                              "created_at": now, "claimed_at": now,
+                                              "status_code": None, "body": None})
+            return None
+        except DuplicateKeyError:
+            # Only one of several concurrent retries can match the old lease
+            taken_over = await self.collection.find_one_and_update(
+                {"key": key, "status_code": None, "claimed_at": {"$lte": now - self.lock_timeout}},
+                {"$set": {"fingerprint": fingerprint, "created_at": now, "claimed_at": now}},
+            )
+            if taken_over is not None:
+                return None
+            existing = await self.collection.find_one({"key": key})
+            if existing is None:
+                # Released or expired between our insert and read
+                return await self.claim(key, fingerprint)
+            return existing
+
+    async def complete(self, key: str, status_code: int, body):
+        await self.collection.update_one({"key": key},
+                                         {"$set": {"status_code": status_code, "body": body}})
+
+    async def release(self, key: str):
+        await self.collection.delete_one({"key": key, "status_code": None})
+
+
+def get_idempotency_store(backend: str = STORAGE_BACKEND) -> IdempotencyStore:
+    if backend == "memory":
+        return InMemoryIdempotencyStore()
+    from app.db.mongo import db
+    return MongoIdempotencyStore(db["idempotency_keys"])
+
+
+idempotency_store = get_idempotency_store()
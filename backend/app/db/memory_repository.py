@@ -0,0 +1,172 @@
+# app/db/memory_repository.py
+
+import bisect
+import heapq
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from bson import ObjectId
+from app.db.repository import NoteRepository
+from app.utils.helpers import tokenize
+
+
+def _copy(doc: dict) -> dict:
+    # Callers get their own copy so they can't corrupt the indexes
+    copied = dict(doc)
+    copied["tags"] = list(doc.get("tags") or [])
+    return copied
+
+
+def _recency(doc: dict) -> tuple:
+    return doc["updated_at"], doc["_id"]
+
+
+class IndexedNotes:
+    """A set of notes with secondary indexes.
+
+    - sorted index of (updated_at, _id) for newest-first listing
+    - inverted index tag -> ids
+    - token index word -> ids over title and content
+    """
+
+    def __init__(self):
+        self.docs: Dict[ObjectId, dict] = {}
+        self.by_updated: List[tuple] = []
+        self._by_tag: Dict[str, Set[ObjectId]] = {}
+        self._by_token: Dict[str, Set[ObjectId]] = {}
+
+    @staticmethod
+    def _tokens(doc: dict) -> Set[str]:
+        return set(tokenize(doc.get("title", ""))) | set(tokenize(doc.get("content", "")))
+
+    @staticmethod
+    def _add_postings(index: Dict[str, Set[ObjectId]], keys, note_id: ObjectId):
+        for key in keys:
+            index.setdefault(key, set()).add(note_id)
+
+    @staticmethod
+    def _remove_postings(index: Dict[str, Set[ObjectId]], keys, note_id: ObjectId):
+        for key in keys:
+            postings = index.get(key)
+            if postings is not None:
+                postings.discard(note_id)
+                if not postings:
+                    del index[key]
+
+    def add(self, doc: dict):
+        note_id = doc["_id"]
+        self.docs[note_id] = doc
+        bisect.insort(self.by_updated, _recency(doc))
+        self._add_postings(self._by_tag, set(doc.get("tags") or []), note_id)
+        self._add_postings(self._by_token, self._tokens(doc), note_id)
+
+    def pop(self, note_id: ObjectId) -> Optional[dict]:
+        doc = self.docs.pop(note_id, None)
+        if doc is None:
+            return None
+        entry = _recency(doc)
+        position = bisect.bisect_left(self.by_updated, entry)
+        if position < len(self.by_updated) and self.by_updated[position] == entry:
+            del self.by_updated[position]
+        self._remove_postings(self._by_tag, set(doc.get("tags") or []), note_id)
+        self._remove_postings(self._by_token, self._tokens(doc), note_id)
+        return doc
+
+    def newest(self, limit: int, tag: Optional[str] = None, query: Optional[str] = None) -> List[dict]:
+        """Up to `limit` matching docs, newest first (not copied)."""
+        postings = []
+        if tag is not None:
+            postings.append(self._by_tag.get(tag, set()))
+        for token in set(tokenize(query or "")):
+            postings.append(self._by_token.get(token, set()))
+
+        if not postings:
+            # Walk the sorted index from the newest end
+            newest = self.by_updated[-limit:][::-1] if limit else []
+            return [self.docs[note_id] for _, note_id in newest]
+
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        newest = heapq.nlargest(limit, candidates, key=lambda note_id: _recency(self.docs[note_id]))
+        return [self.docs[note_id] for note_id in newest]
+
+
+class InMemoryNoteRepository(NoteRepository):
+    """Process-local note store: active and archived notes are two separate
+    IndexedNotes, so active-only reads never touch archived data.
+
+    All methods are synchronous underneath (no awaits between reads and
+    writes), so they are atomic with respect to the event loop.
+    """
+
+    def __init__(self):
+        self._active = IndexedNotes()
+        self._archive = IndexedNotes()
+
+    async def list_notes(self, limit: int = 100, tag: Optional[str] = None,
+                         query: Optional[str] = None, include_archived: bool = False) -> List[dict]:
+        docs = self._active.newest(limit, tag, query)
+        if include_archived:
+            archived = self._archive.newest(limit, tag, query)
+            docs = list(heapq.merge(docs, archived, key=_recency, reverse=True))[:limit]
+        return [_copy(doc) for doc in docs]
+
+    async def iter_notes(self, fields: Optional[List[str]] = None,
+                         include_archived: bool = False) -> AsyncIterator[dict]:
+        stores = [self._active, self._archive] if include_archived else [self._active]
+        for store in stores:
+            for doc in list(store.docs.values()):
+                yield _copy(doc)
+
+    async def get(self, note_id: ObjectId) -> Optional[dict]:
+        doc = self._active.docs.get(note_id)
+        return _copy(doc) if doc is not None else None
+
+    async def get_many(self, note_ids: List[ObjectId]) -> List[dict]:
+        docs = self._active.docs
+        return [_copy(docs[note_id]) for note_id in note_ids if note_id in docs]
+
+    async def create(self, note_data: dict) -> dict:
+        doc = _copy(note_data)
+        doc.setdefault("_id", ObjectId())
+        self._active.add(doc)
+        return _copy(doc)
+
+    async def update(self, note_id: ObjectId, note_data: dict) -> Optional[Tuple[dict, dict]]:
+        current = self._active.pop(note_id)
+        if current is None:
+            return None
+        doc = _copy({**current, **note_data, "_id": note_id})
+        self._active.add(doc)
+        return _copy(current), _copy(doc)
+
+    async def delete(self, note_id: ObjectId) -> Optional[dict]:
+        doc = self._active.pop(note_id)
+        return _copy(doc) if doc is not None else None
+
+    async def archive_stale(self, cutoff: datetime, batch_size: int = 500) -> List[dict]:
+        stale = []
+        # Oldest first; stop at the first note updated after the cutoff
+        for updated_at, note_id in self._active.by_updated:
+            if updated_at >= cutoff or len(stale) >= batch_size:
+                break
+            promoted_at = self._active.docs[note_id].get("promoted_at")
+            if promoted_at is None or promoted_at < cutoff:
+                stale.append(note_id)
+        moved = []
+        for note_id in stale:
+            doc = self._active.pop(note_id)
+            self._archive.add(doc)
+            moved.append(_copy(doc))
+        return moved
+
+    async def restore(self, note_id: ObjectId) -> Optional[dict]:
+        doc = self._archive.pop(note_id)
+        if doc is None:
+            return None
+        doc["promoted_at"] = datetime.utcnow()
+        self._active.add(doc)
+        return _copy(doc)
+
+    async def delete_archived(self, note_id: ObjectId) -> Optional[dict]:
+        doc = self._archive.pop(note_id)
+        return _copy(doc) if doc is not None else None
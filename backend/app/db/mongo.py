@@ -16,3 +16,6 @@ db = client["notes_app_db"]  # database name
 
 # Notes collection
 notes_collection = db["notes"]
+
+# Notes moved out of the primary collection by the archival job
+notes_archive_collection = db["notes_archive"]
@@ -0,0 +1,112 @@
+# app/db/mongo_repository.py
+
+import heapq
+import re
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.db.mongo import notes_archive_collection, notes_collection
+from app.db.repository import NoteRepository
+from app.utils.helpers import tokenize
+
+NEWEST_FIRST = [("updated_at", DESCENDING), ("_id", DESCENDING)]
+
+
+def _recency(doc: dict) -> tuple:
+    return doc["updated_at"], doc["_id"]
+
+
+def _stale_filter(cutoff: datetime) -> dict:
+    return {"updated_at": {"$lt": cutoff}, "promoted_at": {"$not": {"$gte": cutoff}}}
+
+
+class MongoNoteRepository(NoteRepository):
+    def __init__(self, collection=notes_collection, archive=notes_archive_collection):
+        self.collection = collection
+        self.archive = archive
+
+    async def ensure_indexes(self):
+        for collection in (self.collection, self.archive):
+            await collection.create_index([("updated_at", DESCENDING)])
+            await collection.create_index("tags")
+
+    async def list_notes(self, limit: int = 100, tag: Optional[str] = None,
+                         query: Optional[str] = None, include_archived: bool = False) -> List[dict]:
+        conditions = []
+        if tag is not None:
+            conditions.append({"tags": tag})
+        for token in tokenize(query or ""):
+            pattern = {"$regex": rf"\b{re.escape(token)}\b", "$options": "i"}
+            conditions.append({"$or": [{"title": pattern}, {"content": pattern}]})
+        filter_ = {"$and": conditions} if conditions else {}
+        notes = await self.collection.find(filter_).sort(NEWEST_FIRST).to_list(length=limit)
+        if include_archived:
+            archived = await self.archive.find(filter_).sort(NEWEST_FIRST).to_list(length=limit)
+            notes = list(heapq.merge(notes, archived, key=_recency, reverse=True))[:limit]
+        return notes
+
+    async def iter_notes(self, fields: Optional[List[str]] = None,
+                         include_archived: bool = False) -> AsyncIterator[dict]:
+        collections = [self.collection, self.archive] if include_archived else [self.collection]
+        for collection in collections:
+            async for doc in collection.find({}, projection=fields):
+                yield doc
+
+    async def get(self, note_id: ObjectId) -> Optional[dict]:
+        return await self.collection.find_one({"_id": note_id})
+
+    async def get_many(self, note_ids: List[ObjectId]) -> List[dict]:
+        return await self.collection.find({"_id": {"$in": note_ids}}).to_list(length=len(note_ids))
+
+    async def create(self, note_data: dict) -> dict:
+        result = await self.collection.insert_one(note_data)
+        return await self.collection.find_one({"_id": result.inserted_id})
+
+    async def update(self, note_id: ObjectId, note_data: dict) -> Optional[Tuple[dict, dict]]:
+        previous = await self.collection.find_one_and_update(
+            {"_id": note_id},
+            {"$set": note_data},
+            return_document=ReturnDocument.BEFORE
+        )
+        if previous is None:
+            return None
+        return previous, {**previous, **note_data}
+
+    async def delete(self, note_id: ObjectId) -> Optional[dict]:
+        return await self.collection.find_one_and_delete({"_id": note_id})
+
+    async def archive_stale(self, cutoff: datetime, batch_size: int = 500) -> List[dict]:
+        stale = await self.collection.find(_stale_filter(cutoff)) \
+            .sort("updated_at", ASCENDING).limit(batch_size).to_list(length=batch_size)
+        # Copy before deleting so a failure part-way leaves the note active
+        # (at worst also in the archive, which the next run or a restore
+        # cleans up). Every write bumps updated_at past the cutoff, so the
+        # guarded delete only removes a note still equal to the copy.
+        moved = []
+        for doc in stale:
+            await self.archive.replace_one({"_id": doc["_id"]}, doc, upsert=True)
+            result = await self.collection.delete_one({"_id": doc["_id"], **_stale_filter(cutoff)})
+            if result.deleted_count:
+                moved.append(doc)
+            else:
+                # Updated or deleted meanwhile: it was never moved
+                await self.archive.delete_one({"_id": doc["_id"]})
+        return moved
+
+    async def restore(self, note_id: ObjectId) -> Optional[dict]:
+        doc = await self.archive.find_one({"_id": note_id})
+        if doc is None:
+            return None
+        doc["promoted_at"] = datetime.utcnow()
+        try:
+            await self.collection.insert_one(doc)
+        except DuplicateKeyError:
+            # A concurrent read promoted it first
+            doc = None
+        await self.archive.delete_one({"_id": note_id})
+        return doc
+
+    async def delete_archived(self, note_id: ObjectId) -> Optional[dict]:
+        return await self.archive.find_one_and_delete({"_id": note_id})
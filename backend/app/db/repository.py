@@ -0,0 +1,89 @@
+# app/db/repository.py
+
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+from bson import ObjectId
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# "mongo" (default) or "memory"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo").lower()
+
+
+class NoteRepository(ABC):
+    """Storage interface used by the note routes.
+
+    Documents are plain dicts shaped like the Mongo documents: `_id`,
+    `title`, `content`, `tags`, `created_at` and `updated_at` (plus
+    `promoted_at` once a note has been brought back from the archive).
+
+    Notes are either active or archived. Everything except the archive
+    methods and `include_archived` reads works on active notes only.
+    """
+
+    async def ensure_indexes(self):
+        """Create whatever indexes the backend needs (called at startup)."""
+
+    @abstractmethod
+    async def list_notes(self, limit: int = 100, tag: Optional[str] = None,
+                         query: Optional[str] = None, include_archived: bool = False) -> List[dict]:
+        """Most recently updated notes first, optionally filtered by tag
+        and/or by words that must all appear in the title or content."""
+
+    @abstractmethod
+    def iter_notes(self, fields: Optional[List[str]] = None,
+                   include_archived: bool = False) -> AsyncIterator[dict]:
+        """Stream every note, in no particular order (used by startup loaders
+        and rebuild jobs). `fields` limits what is fetched where supported."""
+
+    @abstractmethod
+    async def get(self, note_id: ObjectId) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def get_many(self, note_ids: List[ObjectId]) -> List[dict]:
+        """The notes that exist among `note_ids`, in no particular order."""
+
+    @abstractmethod
+    async def create(self, note_data: dict) -> dict:
+        ...
+
+    @abstractmethod
+    async def update(self, note_id: ObjectId, note_data: dict) -> Optional[Tuple[dict, dict]]:
+        """Set the given fields; returns (previous, updated) or None if missing."""
+
+    @abstractmethod
+    async def delete(self, note_id: ObjectId) -> Optional[dict]:
+        """Remove the note and return it (None if missing)."""
+
+    @abstractmethod
+    async def archive_stale(self, cutoff: datetime, batch_size: int = 500) -> List[dict]:
+        """Move up to `batch_size` notes neither updated nor promoted since
+        `cutoff` into the archive, oldest first; returns the moved notes."""
+
+    @abstractmethod
+    async def restore(self, note_id: ObjectId) -> Optional[dict]:
+        """Promote an archived note back to active, stamping `promoted_at`.
+        Returns the note only if this call promoted it."""
+
+    @abstractmethod
+    async def delete_archived(self, note_id: ObjectId) -> Optional[dict]:
+        """Remove an archived note and return it (None if missing)."""
+
+
+def get_repository(backend: str = STORAGE_BACKEND) -> NoteRepository:
+    # Imported lazily so the memory backend runs without Motor/MongoDB
+    if backend == "memory":
+        from app.db.memory_repository import InMemoryNoteRepository
+        return InMemoryNoteRepository()
+    if backend == "mongo":
+        from app.db.mongo_repository import MongoNoteRepository
+        return MongoNoteRepository()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend!r}")
+
+
+notes_repository = get_repository()
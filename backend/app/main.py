@@ -1,8 +1,17 @@
 # app/main.py
 
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from app.db.idempotency import idempotency_store
+from app.db.repository import notes_repository
 from app.routes.note_routes import router as note_router
+from app.routes.admin_routes import router as admin_router
+from app.utils.archival import ARCHIVE_AFTER_DAYS, archival_loop
+from app.utils.compression import CompressionMiddleware
+from app.utils.related import related_index
+from app.utils.suggest import suggest_index
+from app.utils.profiling import PROFILING_ENABLED, start_request, finish_request
 
 app = FastAPI(title="Notes API", version="1.0.0")
 
@@ -13,7 +22,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Compress larger responses (gzip, plus brotli/zstd when installed)
+app.add_middleware(CompressionMiddleware)
+
+@app.on_event("startup")
+async def create_indexes():
+    await notes_repository.ensure_indexes()
+    await idempotency_store.ensure_indexes()
+    await suggest_index.load(notes_repository)
+    await related_index.load(notes_repository)
+
+# Optional: move notes untouched for ARCHIVE_AFTER_DAYS into the archive
+archival_task = None
+
+@app.on_event("startup")
+async def start_archival():
+    global archival_task
+    if ARCHIVE_AFTER_DAYS > 0:
+        archival_task = asyncio.create_task(archival_loop())
+
+@app.on_event("shutdown")
+async def stop_archival():
+    if archival_task is not None:
+        archival_task.cancel()
+
+# Optional: per-phase request timings, Server-Timing header and slow-request log
+if PROFILING_ENABLED:
+    @app.middleware("http")
+    async def profile_requests(request: Request, call_next):
+        timings = start_request()
+        response = await call_next(request)
+        finish_request(timings, request, response)
+        return response
+
 # Register routes
 app.include_router(note_router)
+app.include_router(admin_router)
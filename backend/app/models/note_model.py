@@ -31,3 +31,7 @@ class NoteDBModel(NoteModel):
         allow_population_by_field_name = True
         json_encoders = {ObjectId: str}
         orm_mode = True
+
+# A note returned by /notes/{id}/related with its similarity score
+class RelatedNoteModel(NoteDBModel):
+    score: float
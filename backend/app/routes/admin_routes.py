@@ -0,0 +1,48 @@
+# app/routes/admin_routes.py
+import hmac
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException
+from app.db.analytics import rollup_store
+from app.utils.archival import ARCHIVE_AFTER_DAYS, archive_stale_notes
+from app.utils.profiling import ADMIN_TOKEN, MIN_SAMPLING_INTERVAL_MS, sampling_profiler
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN or x_admin_token is None or \
+            not hmac.compare_digest(x_admin_token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+# GET sampling profiler status and top stacks
+@router.get("/profiler")
+async def get_profiler(limit: int = 20):
+    return sampling_profiler.report(limit)
+
+# POST start the sampling profiler
+@router.post("/profiler/start")
+async def start_profiler(interval_ms: float = 5.0):
+    if not sampling_profiler.running:
+        sampling_profiler.interval = max(interval_ms, MIN_SAMPLING_INTERVAL_MS) / 1000
+    sampling_profiler.start()
+    return sampling_profiler.report(limit=0)
+
+# POST stop the sampling profiler and return what it collected
+@router.post("/profiler/stop")
+async def stop_profiler(limit: int = 20):
+    sampling_profiler.stop()
+    return sampling_profiler.report(limit)
+
+# POST repair analytics gauges (and seed missing counters) in the background
+@router.post("/analytics/rebuild", status_code=202)
+async def rebuild_analytics(background_tasks: BackgroundTasks):
+    background_tasks.add_task(rollup_store.rebuild)
+    return {"status": "scheduled"}
+
+# POST archive notes not updated for `days` days, in the background
+@router.post("/archive/run", status_code=202)
+async def run_archival(background_tasks: BackgroundTasks, days: Optional[int] = None):
+    days = days if days is not None else ARCHIVE_AFTER_DAYS
+    if days <= 0:
+        raise HTTPException(status_code=400, detail="Pass days or set ARCHIVE_AFTER_DAYS")
+    background_tasks.add_task(archive_stale_notes, days)
+    return {"status": "scheduled", "days": days}
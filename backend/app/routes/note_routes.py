@@ -1,61 +1,178 @@
 # app/routes/note_routes.py
-from fastapi import APIRouter, HTTPException, status
+import logging
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from bson import ObjectId
 from datetime import datetime
-from app.db.mongo import notes_collection
-from app.models.note_model import NoteModel, NoteDBModel
+from app.db.analytics import rollup_store
+from app.db.idempotency import idempotency_store
+from app.db.repository import notes_repository
+from app.models.note_model import NoteModel, NoteDBModel, RelatedNoteModel
+from app.utils.helpers import fingerprint
+from app.utils.profiling import profiled, timed, validate
+from app.utils.related import related_index
+from app.utils.suggest import suggest_index
 
 router = APIRouter(prefix="/notes", tags=["notes"])
+logger = logging.getLogger("notes.routes")
+
+async def promote_archived(note_id: ObjectId) -> Optional[dict]:
+    """Bring an archived note back to the active set; returns it if found."""
+    note = await notes_repository.restore(note_id)
+    if note is None:
+        # Not archived, or a concurrent request promoted it first
+        return await notes_repository.get(note_id)
+    suggest_index.add_note(note)
+    related_index.add(note)
+    return note
+
+async def after_write(previous: Optional[dict], current: Optional[dict], indexed: bool = True):
+    """Analytics and in-process index upkeep for a committed write. The
+    write already stands, so failures here are logged, not returned."""
+    note_id = (current or previous)["_id"]
+    try:
+        with timed("db"):
+            await rollup_store.record(previous, current)
+    except Exception:
+        logger.exception("Recording analytics for note %s failed", note_id)
+    if not indexed:
+        return
+    try:
+        if previous is not None:
+            suggest_index.remove_note(previous)
+            related_index.remove(previous)
+        if current is not None:
+            suggest_index.add_note(current)
+            related_index.add(current)
+    except Exception:
+        logger.exception("Indexing note %s failed", note_id)
 
 # GET all notes
 @router.get("/", response_model=list[NoteDBModel])
-async def get_notes():
-    notes_cursor = notes_collection.find()
-    notes = await notes_cursor.to_list(length=100)
-    return notes
+@profiled
+async def get_notes(tag: Optional[str] = None, q: Optional[str] = None,
+                    limit: int = Query(100, ge=1, le=1000), include_archived: bool = False):
+    with timed("db"):
+        notes = await notes_repository.list_notes(limit=limit, tag=tag, query=q,
+                                                  include_archived=include_archived)
+    return [validate(NoteDBModel, note) for note in notes]
 
-# GET note by ID
+# GET activity rollups (declared before /{note_id} so it isn't taken for an ID)
+@router.get("/analytics")
+@profiled
+async def get_analytics(days: int = Query(30, ge=1, le=366)):
+    with timed("db"):
+        return await rollup_store.read(days=days)
+
+# GET title and tag completions ranked by how many notes use them
+@router.get("/suggest")
+@profiled
+async def suggest(prefix: str = Query(..., min_length=1, max_length=100), limit: int = Query(10, ge=1, le=50)):
+    return suggest_index.suggest(prefix, limit)
+
+# GET note by ID (archived notes are promoted back transparently)
 @router.get("/{note_id}", response_model=NoteDBModel)
+@profiled
 async def get_note(note_id: str):
     if not ObjectId.is_valid(note_id):
         raise HTTPException(status_code=400, detail="Invalid note ID")
-    note = await notes_collection.find_one({"_id": ObjectId(note_id)})
+    with timed("db"):
+        note = await notes_repository.get(ObjectId(note_id))
+        if note is None:
+            note = await promote_archived(ObjectId(note_id))
     if note is None:
         raise HTTPException(status_code=404, detail="Note not found")
-    return note
+    return validate(NoteDBModel, note)
+
+def replay_idempotent(record: dict, request_fingerprint: str):
+    """Stored response for a repeated Idempotency-Key, or an error if the
+    key was reused for a different body or the first request is still running."""
+    if record["fingerprint"] != request_fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    if record["status_code"] is None:
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+    return JSONResponse(content=record["body"], status_code=record["status_code"],
+                        headers={"Idempotent-Replayed": "true"})
 
-# POST create new note
+# GET the notes most similar to this one (TF-IDF cosine similarity)
+@router.get("/{note_id}/related", response_model=list[RelatedNoteModel])
+@profiled
+async def get_related_notes(note_id: str, limit: int = Query(5, ge=1, le=50)):
+    if not ObjectId.is_valid(note_id):
+        raise HTTPException(status_code=400, detail="Invalid note ID")
+    with timed("db"):
+        note = await notes_repository.get(ObjectId(note_id))
+        if note is None:
+            note = await promote_archived(ObjectId(note_id))
+    if note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    with timed("similarity"):
+        ranked = related_index.related(note, limit)
+    with timed("db"):
+        found = {doc["_id"]: doc for doc in await notes_repository.get_many([i for i, _ in ranked])}
+    return [validate(RelatedNoteModel, {**found[i], "score": score}) for i, score in ranked if i in found]
+
+# POST create new note (retries with the same Idempotency-Key replay the first response)
 @router.post("/", response_model=NoteDBModel, status_code=status.HTTP_201_CREATED)
-async def create_note(note: NoteModel):
+@profiled
+async def create_note(note: NoteModel, idempotency_key: Optional[str] = Header(None, max_length=255)):
     note_data = note.dict()
-    note_data["created_at"] = datetime.utcnow()
-    note_data["updated_at"] = datetime.utcnow()
-    result = await notes_collection.insert_one(note_data)
-    new_note = await notes_collection.find_one({"_id": result.inserted_id})
-    return new_note
+    if idempotency_key is not None:
+        request_fingerprint = fingerprint(note_data)
+        with timed("db"):
+            existing = await idempotency_store.claim(idempotency_key, request_fingerprint)
+        if existing is not None:
+            return replay_idempotent(existing, request_fingerprint)
+
+    note_data["created_at"] = note_data["updated_at"] = datetime.utcnow()
+    try:
+        with timed("db"):
+            new_note = await notes_repository.create(note_data)
+    except BaseException:
+        if idempotency_key is not None:
+            await idempotency_store.release(idempotency_key)
+        raise
+
+    # The note exists from here on, so a retry must replay it no matter what
+    # happens to the bookkeeping below
+    if idempotency_key is not None:
+        with timed("db"):
+            await idempotency_store.complete(idempotency_key, status.HTTP_201_CREATED,
+                                             jsonable_encoder(NoteDBModel.parse_obj(new_note), by_alias=True))
+    await after_write(None, new_note)
+    return validate(NoteDBModel, new_note)
 
 # PUT update note
 @router.put("/{note_id}", response_model=NoteDBModel)
+@profiled
 async def update_note(note_id: str, note: NoteModel):
     if not ObjectId.is_valid(note_id):
         raise HTTPException(status_code=400, detail="Invalid note ID")
     note_data = note.dict()
     note_data["updated_at"] = datetime.utcnow()
-    updated = await notes_collection.find_one_and_update(
-        {"_id": ObjectId(note_id)},
-        {"$set": note_data},
-        return_document=True
-    )
-    if updated is None:
+    with timed("db"):
+        result = await notes_repository.update(ObjectId(note_id), note_data)
+        if result is None and await promote_archived(ObjectId(note_id)) is not None:
+            result = await notes_repository.update(ObjectId(note_id), note_data)
+    if result is None:
         raise HTTPException(status_code=404, detail="Note not found")
-    return updated
+    previous, updated = result
+    await after_write(previous, updated)
+    return validate(NoteDBModel, updated)
 
 # DELETE note
 @router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
+@profiled
 async def delete_note(note_id: str):
     if not ObjectId.is_valid(note_id):
         raise HTTPException(status_code=400, detail="Invalid note ID")
-    result = await notes_collection.delete_one({"_id": ObjectId(note_id)})
-    if result.deleted_count == 0:
+    with timed("db"):
+        deleted = await notes_repository.delete(ObjectId(note_id))
+        archived = None if deleted is not None else await notes_repository.delete_archived(ObjectId(note_id))
+    if deleted is None and archived is None:
         raise HTTPException(status_code=404, detail="Note not found")
+    # Archived notes are not in the in-process indexes
+    await after_write(deleted or archived, None, indexed=deleted is not None)
     return
@@ -0,0 +1,52 @@
+# app/utils/archival.py
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from app.db.repository import notes_repository
+from app.utils.related import related_index
+from app.utils.suggest import suggest_index
+
+# Load environment variables
+load_dotenv()
+
+# Notes not updated (or read back from the archive) for this many days are
+# archived; 0 disables the background job
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "0"))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+
+logger = logging.getLogger("notes.archival")
+
+
+async def archive_stale_notes(days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Archive every stale note in batches; returns how many were moved.
+
+    Archived notes leave the in-process suggestion and related-notes
+    indexes, which only cover active notes.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    total = 0
+    while True:
+        moved = await notes_repository.archive_stale(cutoff, batch_size)
+        for note in moved:
+            suggest_index.remove_note(note)
+            related_index.remove(note)
+        total += len(moved)
+        if len(moved) < batch_size:
+            return total
+        # Let request handlers run between batches
+        await asyncio.sleep(0)
+
+
+async def archival_loop():
+    while True:
+        try:
+            moved = await archive_stale_notes()
+            if moved:
+                logger.info("Archived %d notes not updated in %d days", moved, ARCHIVE_AFTER_DAYS)
+        except Exception:
+            logger.exception("Archival run failed")
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
@@ -0,0 +1,214 @@
+# app/utils/compression.py
+
+import os
+import zlib
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional
+    zstandard = None
+
+# Load environment variables
+load_dotenv()
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # bytes
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", "3"))
+
+# Content types that are already compressed or must not be buffered
+SKIP_CONTENT_TYPES = ("image/", "video/", "audio/", "font/woff", "text/event-stream",
+                      "application/zip", "application/gzip", "application/x-gzip",
+                      "application/zstd", "application/octet-stream")
+
+# Statuses that never carry a body (1xx are covered separately)
+NO_BODY_STATUSES = (204, 304)
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def available_encodings() -> List[str]:
+    """Encodings this server can produce, most preferred first."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def negotiate(header: str, encodings: List[str]) -> Optional[str]:
+    """Best encoding from `encodings` the client accepts: highest q-value,
+    ties going to our order."""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _with_vary(headers):
+    headers = list(headers)
+    for index, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[index] = (name, value + b", Accept-Encoding")
+            return headers
+    headers.append((b"vary", b"Accept-Encoding"))
+    return headers
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing HTTP responses with zstd, brotli or gzip.
+
+    Bodies smaller than `minimum_size`, responses that already carry a
+    Content-Encoding, already-compressed content types, HEAD requests and
+    bodiless statuses (1xx, 204, 304) pass through untouched. Streaming responses are compressed chunk by chunk.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, gzip_level: int = GZIP_LEVEL,
+                 brotli_quality: int = BROTLI_QUALITY, zstd_level: int = ZSTD_LEVEL):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality, "zstd": zstd_level}
+        self.encodings = available_encodings()
+
+    def _compressor(self, encoding: str):
+        factory = {"gzip": _Gzip, "br": _Brotli, "zstd": _Zstd}[encoding]
+        return factory(self.levels[encoding])
+
+    async def __call__(self, scope, receive, send):
+        # HEAD responses describe a body that is never sent; compressing the
+        # empty one would advertise the wrong length and encoding
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        request_headers = dict(scope.get("headers") or [])
+        encoding = negotiate(request_headers.get(b"accept-encoding", b"").decode("latin-1"), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Hold the headers until we've seen the first body chunk
+                start_message = message
+                headers = dict(message.get("headers") or [])
+                content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+                status = message["status"]
+                passthrough = (status < 200 or status in NO_BODY_STATUSES or b"content-encoding" in headers
+                               or content_type.startswith(SKIP_CONTENT_TYPES))
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if passthrough:
+                if start_message is not None:
+                    await send(start_message)
+                    start_message = None
+                await send(message)
+                return
+
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    start_message["headers"] = _with_vary(start_message.get("headers") or [])
+                    await send(start_message)
+                    start_message = None
+                    passthrough = True
+                    await send(message)
+                    return
+                compressor = self._compressor(encoding)
+                headers = [(k, v) for k, v in start_message.get("headers") or [] if k != b"content-length"]
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+                if not more_body:
+                    compressed = compressor.compress(body) + compressor.finish()
+                    headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+                    start_message["headers"] = _with_vary(headers)
+                    await send(start_message)
+                    start_message = None
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                start_message["headers"] = _with_vary(headers)
+                await send(start_message)
+                start_message = None
+
+            chunk = compressor.compress(body)
+            if not more_body:
+                chunk += compressor.finish()
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
@@ -0,0 +1,19 @@
+# app/utils/helpers.py
+
+import hashlib
+import json
+import re
+from typing import List
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens, in order, duplicates kept."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def fingerprint(data) -> str:
+    """Stable hash of a JSON-serialisable payload."""
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
@@ -0,0 +1,180 @@
+# app/utils/profiling.py
+
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Instrumentation is opt-in; nothing below costs anything unless this is set
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+# Admin endpoints are disabled while no token is configured
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+logger = logging.getLogger("notes.profiling")
+
+_current_timings = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Per-request phase durations in seconds (parse, db, validate, encode)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.handler_finished = None
+        self.phases = {}
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        entries.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(entries)
+
+
+def start_request() -> RequestTimings:
+    timings = RequestTimings()
+    _current_timings.set(timings)
+    return timings
+
+
+def finish_request(timings: RequestTimings, request, response):
+    """Close out the request: encode phase, Server-Timing header, slow log."""
+    finished = time.perf_counter()
+    if timings.handler_finished is not None:
+        timings.add("encode", finished - timings.handler_finished)
+    total = finished - timings.started
+    response.headers["Server-Timing"] = timings.server_timing(total)
+
+    if total * 1000 >= SLOW_REQUEST_MS:
+        logger.warning(json.dumps({
+            "event": "slow_request",
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 2),
+            "phases_ms": {name: round(s * 1000, 2) for name, s in timings.phases.items()},
+        }))
+
+
+@contextmanager
+def timed(phase: str):
+    """Attribute the wrapped block to `phase` for the current request."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - started)
+
+
+def validate(model, data):
+    """While profiling, validate a DB document against `model` up front so
+    the validate phase can be timed. Otherwise return it untouched and let
+    FastAPI's response_model validation do the work once."""
+    if _current_timings.get() is None:
+        return data
+    with timed("validate"):
+        return model.parse_obj(data)
+
+
+def profiled(handler):
+    """Route decorator: time from request start to handler entry is the parse
+    phase, and everything after the handler returns is the encode phase."""
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        timings = _current_timings.get()
+        if timings is None:
+            return await handler(*args, **kwargs)
+        timings.add("parse", time.perf_counter() - timings.started)
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            timings.handler_finished = time.perf_counter()
+
+    return wrapper
+
+
+# Sampling faster than this just spins the sampler thread on the GIL
+MIN_SAMPLING_INTERVAL_MS = 1.0
+
+
+class SamplingProfiler:
+    """Background thread that periodically samples every thread's stack and
+    counts collapsed stacks (flamegraph.pl compatible)."""
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 40):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = Counter()
+        self.sample_count = 0
+        self._samples_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        with self._samples_lock:
+            self.samples.clear()
+            self.sample_count = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            keys = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = traceback.extract_stack(frame)[-self.max_depth:]
+                keys.append(";".join(f"{f.name} ({os.path.basename(f.filename)}:{f.lineno})" for f in stack))
+            with self._samples_lock:
+                self.samples.update(keys)
+                self.sample_count += 1
+
+    def report(self, limit: int = 20) -> dict:
+        with self._samples_lock:
+            samples = self.samples.copy()
+            sample_count = self.sample_count
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "samples": sample_count,
+            "top_stacks": [
+                {"stack": stack, "count": count}
+                for stack, count in samples.most_common(limit)
+            ],
+        }
+
+
+sampling_profiler = SamplingProfiler()
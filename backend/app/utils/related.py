@@ -0,0 +1,281 @@
+# app/utils/related.py
+
+import asyncio
+import logging
+import os
+import zlib
+from collections import Counter
+from typing import Dict, List, Tuple
+import numpy as np
+import scipy.sparse as sp
+from bson import ObjectId
+from dotenv import load_dotenv
+from app.utils.helpers import tokenize
+
+# Load environment variables
+load_dotenv()
+
+# Hashed feature space size and how many writes are buffered before a merge
+RELATED_FEATURES = int(os.getenv("RELATED_FEATURES", str(2 ** 18)))
+RELATED_MERGE_EVERY = int(os.getenv("RELATED_MERGE_EVERY", "1024"))
+
+logger = logging.getLogger("notes.related")
+
+# Field weights applied to term counts
+TITLE_WEIGHT = 2.0
+TAG_WEIGHT = 3.0
+
+
+def note_features(note: dict, n_features: int = RELATED_FEATURES) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed, field-weighted, sublinear term frequencies: (indices, values)."""
+    counts = Counter()
+    for token in tokenize(note.get("content") or ""):
+        counts[token] += 1.0
+    for token in tokenize(note.get("title") or ""):
+        counts[token] += TITLE_WEIGHT
+    for tag in note.get("tags") or []:
+        counts["#" + tag.casefold()] += TAG_WEIGHT
+
+    buckets: Dict[int, float] = {}
+    for term, count in counts.items():
+        index = zlib.crc32(term.encode("utf-8")) % n_features
+        buckets[index] = buckets.get(index, 0.0) + count
+    indices = np.fromiter(buckets.keys(), dtype=np.int32, count=len(buckets))
+    values = np.fromiter(buckets.values(), dtype=np.float32, count=len(buckets))
+    order = np.argsort(indices)
+    return indices[order], (1.0 + np.log(values[order])).astype(np.float32)
+
+
+def _rows_csr(rows: List[Tuple[np.ndarray, np.ndarray]], n_features: int) -> sp.csr_matrix:
+    if rows:
+        indptr = np.cumsum([0] + [len(indices) for indices, _ in rows])
+        indices = np.concatenate([indices for indices, _ in rows])
+        values = np.concatenate([values for _, values in rows])
+    else:
+        indptr, indices, values = np.zeros(1, dtype=np.int64), [], []
+    return sp.csr_matrix((values, indices, indptr), shape=(len(rows), n_features), dtype=np.float32)
+
+
+def _compact(ids: List[ObjectId], base: sp.csc_matrix, rows, alive: np.ndarray,
+             df: np.ndarray, count: int, n_features: int):
+    """Fold `rows` into `base`, keep the `alive` rows and recompute IDF,
+    norms and slot numbering. Pure function of its arguments, so it can run
+    off the event loop."""
+    matrix = sp.vstack([base, _rows_csr(rows, n_features)], format="csr")
+    keep = np.flatnonzero(alive)
+    kept_ids = [ids[slot] for slot in keep.tolist()]
+    slots = {note_id: slot for slot, note_id in enumerate(kept_ids)}
+    matrix = matrix[keep]
+    idf = (np.log((1.0 + count) / (1.0 + df)) + 1.0).astype(np.float32)
+    weighted = matrix.multiply(idf).tocsr()
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel()).astype(np.float32)
+    return keep, kept_ids, slots, matrix.tocsc(), idf, norms
+
+
+class RelatedIndex:
+    """TF-IDF cosine similarity over hashed note features.
+
+    Rows live in a CSC `base` matrix (so a query only reads the columns of
+    its own features) plus a small buffer of recent rows. Deletes and the
+    old side of updates are tombstoned; every `merge_every` writes the
+    buffer is merged into the base, dead rows are dropped and IDF is
+    refreshed, so IDF lags by at most that many writes (plus one merge).
+
+    Inside an event loop the merge runs in the default executor on a
+    snapshot and is swapped in when done; writes made meanwhile are
+    carried over, so requests never wait for it.
+
+    Callers pass the same document they indexed to `remove`, which lets the
+    index avoid keeping a per-note copy of its features.
+    """
+
+    def __init__(self, n_features: int = RELATED_FEATURES, merge_every: int = RELATED_MERGE_EVERY):
+        self.n_features = n_features
+        self.merge_every = merge_every
+        self._generation = 0
+        self._reset()
+
+    def _reset(self):
+        self._df = np.zeros(self.n_features, dtype=np.int64)
+        self._count = 0
+        self._idf = np.ones(self.n_features, dtype=np.float32)
+        self._base = sp.csc_matrix((0, self.n_features), dtype=np.float32)
+        self._pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._pending_matrix = None
+        # Per slot (base rows first, then pending rows); `_alive`/`_norms`
+        # have spare capacity past len(self._ids)
+        self._ids: List[ObjectId] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._slots: Dict[ObjectId, int] = {}
+        self._writes = 0
+        self._merging = None
+        # Bumped on reset so a merge started before it is discarded
+        self._generation += 1
+
+    def __len__(self):
+        return self._count
+
+    # -- writes ---------------------------------------------------------------
+
+    def add(self, note: dict):
+        note_id = note["_id"]
+        if note_id in self._slots:
+            return
+        indices, values = note_features(note, self.n_features)
+        self._df[indices] += 1
+        self._count += 1
+        slot = len(self._ids)
+        if slot == len(self._alive):
+            # Grow geometrically so appends stay amortized O(1)
+            capacity = max(16, 2 * slot)
+            self._alive = np.concatenate([self._alive, np.zeros(capacity - slot, dtype=bool)])
+            self._norms = np.concatenate([self._norms, np.zeros(capacity - slot, dtype=np.float32)])
+        self._slots[note_id] = slot
+        self._ids.append(note_id)
+        self._pending.append((indices, values))
+        self._pending_matrix = None
+        self._alive[slot] = True
+        self._norms[slot] = self._norm(indices, values)
+        self._wrote()
+
+    def remove(self, note: dict):
+        slot = self._slots.pop(note["_id"], None)
+        if slot is None:
+            return
+        indices, _ = note_features(note, self.n_features)
+        self._df[indices] -= 1
+        self._count -= 1
+        self._alive[slot] = False
+        self._wrote()
+
+    def update(self, previous: dict, current: dict):
+        self.remove(previous)
+        self.add(current)
+
+    async def load(self, repository):
+        self.build([note async for note in repository.iter_notes(fields=["title", "content", "tags"])])
+
+    def build(self, notes):
+        """Replace the index contents with `notes` in one bulk build."""
+        self._reset()
+        rows = []
+        for note in notes:
+            if note["_id"] in self._slots:
+                continue
+            indices, values = note_features(note, self.n_features)
+            self._df[indices] += 1
+            self._slots[note["_id"]] = len(self._ids)
+            self._ids.append(note["_id"])
+            rows.append((indices, values))
+        self._count = len(self._ids)
+        self._pending = rows
+        self._alive = np.ones(len(rows), dtype=bool)
+        self._norms = np.zeros(len(rows), dtype=np.float32)
+        self._merge()
+
+    def _wrote(self):
+        self._writes += 1
+        if self._writes < self.merge_every or self._merging is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to keep responsive (startup, scripts)
+            self._merge()
+            return
+        snapshot, generation = self._snapshot(), self._generation
+        self._merging = loop.run_in_executor(None, _compact, *snapshot[1:])
+        self._merging.add_done_callback(lambda future: self._merged(future, generation, snapshot[0]))
+
+    def _snapshot(self):
+        """(slot count, ids, base, rows, alive, df, count, n_features) as of now."""
+        self._writes = 0
+        size = len(self._ids)
+        return (size, self._ids[:size], self._base, list(self._pending), self._alive[:size].copy(),
+                self._df.copy(), self._count, self.n_features)
+
+    def _merge(self):
+        """Fold pending rows into the base, drop dead rows, refresh IDF/norms."""
+        snapshot = self._snapshot()
+        self._install(snapshot[0], *_compact(*snapshot[1:]))
+
+    def _merged(self, future, generation: int, size: int):
+        if generation != self._generation:
+            return
+        self._merging = None
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logger.error("Related index merge failed", exc_info=future.exception())
+            return
+        self._install(size, *future.result())
+
+    def _install(self, size: int, keep: np.ndarray, kept_ids: List[ObjectId], slots: Dict[ObjectId, int],
+                 base: sp.csc_matrix, idf: np.ndarray, norms: np.ndarray):
+        """Swap in a compacted base covering the first `size` slots; slots
+        added after the snapshot stay pending, and tombstones set after it
+        carry over. Only the writes made since the snapshot are replayed
+        here, so this stays cheap on the event loop."""
+        merged_rows = size - self._base.shape[0]
+        later_ids = self._ids[size:]
+        later_rows = self._pending[merged_rows:]
+        kept_alive = self._alive[keep]
+        later_alive = self._alive[size:len(self._ids)]
+
+        for slot in np.flatnonzero(~kept_alive).tolist():
+            del slots[kept_ids[slot]]
+        for offset in np.flatnonzero(later_alive).tolist():
+            slots[later_ids[offset]] = len(kept_ids) + offset
+
+        self._ids = kept_ids + later_ids
+        self._slots = slots
+        self._alive = np.concatenate([kept_alive, later_alive])
+        self._base = base
+        self._idf = idf
+        self._pending = later_rows
+        self._pending_matrix = None
+        self._norms = np.concatenate([
+            norms, np.array([self._norm(indices, values) for indices, values in later_rows], dtype=np.float32),
+        ])
+
+    # -- queries --------------------------------------------------------------
+
+    def _norm(self, indices: np.ndarray, values: np.ndarray) -> float:
+        return float(np.sqrt(np.sum((values * self._idf[indices]) ** 2)))
+
+    def _pending_csr(self) -> sp.csr_matrix:
+        if self._pending_matrix is None:
+            self._pending_matrix = _rows_csr(self._pending, self.n_features)
+        return self._pending_matrix
+
+    def related(self, note: dict, limit: int = 5) -> List[Tuple[ObjectId, float]]:
+        """Up to `limit` (note id, cosine similarity) pairs, most similar first."""
+        indices, values = note_features(note, self.n_features)
+        query_norm = self._norm(indices, values)
+        if not self._ids or query_norm == 0:
+            return []
+        # score_d = sum_f (x_df * idf_f) * (q_f * idf_f)
+        weights = values * self._idf[indices] ** 2
+        dots = np.concatenate([
+            self._base[:, indices] @ weights,
+            self._pending_csr()[:, indices] @ weights,
+        ])
+        size = len(self._ids)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = dots / (self._norms[:size] * query_norm)
+        scores[~self._alive[:size] | ~(dots > 0)] = -np.inf
+        own_slot = self._slots.get(note.get("_id"))
+        if own_slot is not None:
+            scores[own_slot] = -np.inf
+
+        candidates = min(limit, int(np.isfinite(scores).sum()))
+        if candidates == 0:
+            return []
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        top = top[np.argsort(-scores[top])]
+        return [(self._ids[slot], float(scores[slot])) for slot in top]
+
+
+related_index = RelatedIndex()
+
@@ -0,0 +1,107 @@
+# app/utils/suggest.py
+
+import bisect
+import heapq
+import os
+from typing import Dict, List
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Upper bound on distinct terms per index (titles and tags each)
+SUGGEST_MAX_TERMS = int(os.getenv("SUGGEST_MAX_TERMS", "50000"))
+MAX_TERM_LENGTH = 100
+
+_PREFIX_END = chr(0x10FFFF)
+
+
+def _normalize(term: str) -> str:
+    return " ".join(term.split()).casefold()[:MAX_TERM_LENGTH]
+
+
+class PrefixIndex:
+    """Sorted array of normalized terms plus per-term counts.
+
+    A prefix is a contiguous slice of the sorted array, found with two
+    bisects; the slice is then ranked by count. Once `max_terms` distinct
+    terms are indexed, new terms are ignored until others drop to zero.
+    """
+
+    def __init__(self, max_terms: int = SUGGEST_MAX_TERMS):
+        self.max_terms = max_terms
+        self._keys: List[str] = []
+        # normalized term -> [display text, count]
+        self._entries: Dict[str, list] = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, term: str):
+        key = _normalize(term)
+        if not key:
+            return
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[1] += 1
+        elif len(self._keys) < self.max_terms:
+            self._entries[key] = [term.strip()[:MAX_TERM_LENGTH], 1]
+            bisect.insort(self._keys, key)
+
+    def remove(self, term: str):
+        key = _normalize(term)
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self._entries[key]
+            del self._keys[bisect.bisect_left(self._keys, key)]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        key = _normalize(prefix)
+        start = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_left(self._keys, key + _PREFIX_END, start)
+        best = heapq.nlargest(
+            limit, range(start, end),
+            key=lambda i: (self._entries[self._keys[i]][1], -i)
+        )
+        return [{"text": self._entries[self._keys[i]][0], "count": self._entries[self._keys[i]][1]}
+                for i in best]
+
+
+class SuggestIndex:
+    """Title and tag completions, kept in process.
+
+    Loaded from the repository at startup and kept current by the note
+    write handlers; each worker process holds its own copy.
+    """
+
+    def __init__(self, max_terms: int = SUGGEST_MAX_TERMS):
+        self.titles = PrefixIndex(max_terms)
+        self.tags = PrefixIndex(max_terms)
+
+    def add_note(self, note: dict):
+        self.titles.add(note.get("title") or "")
+        for tag in set(note.get("tags") or []):
+            self.tags.add(tag)
+
+    def remove_note(self, note: dict):
+        self.titles.remove(note.get("title") or "")
+        for tag in set(note.get("tags") or []):
+            self.tags.remove(tag)
+
+    async def load(self, repository):
+        self.titles = PrefixIndex(self.titles.max_terms)
+        self.tags = PrefixIndex(self.tags.max_terms)
+        async for note in repository.iter_notes(fields=["title", "tags"]):
+            self.add_note(note)
+
+    def suggest(self, prefix: str, limit: int = 10) -> dict:
+        return {
+            "titles": self.titles.suggest(prefix, limit),
+            "tags": self.tags.suggest(prefix, limit),
+        }
+
+
+suggest_index = SuggestIndex()
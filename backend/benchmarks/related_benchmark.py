@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the related-notes index.
+
+Builds a RelatedIndex over synthetic notes and reports query latency,
+plus the cost of incremental writes. Run from the backend directory:
+
+    python -m benchmarks.related_benchmark --notes 100000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime
+from bson import ObjectId
+from app.utils.related import RelatedIndex
+
+def make_vocabulary(size, rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choices(letters, k=rng.randint(3, 9))) for _ in range(size)]
+
+def make_note(vocabulary, tags, rng):
+    # Zipf-ish word choice so some words are common and most are rare
+    words = [vocabulary[min(int(rng.paretovariate(1.1)) - 1, len(vocabulary) - 1)] for _ in range(rng.randint(20, 120))]
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(),
+        "title": " ".join(rng.sample(words, 3)),
+        "content": " ".join(words),
+        "tags": rng.sample(tags, rng.randint(0, 3)),
+        "created_at": now,
+        "updated_at": now,
+    }
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--writes", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(50_000, rng)
+    tags = [f"tag{i}" for i in range(200)]
+
+    print(f"Generating {args.notes} notes...")
+    notes = [make_note(vocabulary, tags, rng) for _ in range(args.notes)]
+
+    index = RelatedIndex()
+    started = time.perf_counter()
+    index.build(notes)
+    print(f"Bulk build: {time.perf_counter() - started:.2f} s")
+
+    latencies = []
+    for note in rng.sample(notes, min(args.queries, len(notes))):
+        started = time.perf_counter()
+        index.related(note, 10)
+        latencies.append((time.perf_counter() - started) * 1000)
+    print(f"Query (top 10) over {len(index)} notes: "
+          f"p50 {statistics.median(latencies):.2f} ms, "
+          f"p95 {percentile(latencies, 95):.2f} ms, "
+          f"p99 {percentile(latencies, 99):.2f} ms")
+
+    # Inside an event loop, as in the API, so merges run in the executor
+    async def write_all():
+        write_latencies = []
+        for i in range(args.writes):
+            started = time.perf_counter()
+            if i % 2:
+                index.add(make_note(vocabulary, tags, rng))
+            else:
+                victim = notes[i]
+                index.update(victim, {**victim, "content": victim["content"] + " edited"})
+            write_latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0)
+        if index._merging is not None:
+            await index._merging
+        return write_latencies
+
+    started = time.perf_counter()
+    write_latencies = asyncio.run(write_all())
+    elapsed = time.perf_counter() - started
+    print(f"Incremental writes: {args.writes} in {elapsed:.2f} s "
+          f"({elapsed / args.writes * 1000:.3f} ms/write incl. merges every {index.merge_every}, "
+          f"max {max(write_latencies):.2f} ms on the loop)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+# tests/conftest.py
+import os
+import sys
+
+# Must be set before anything imports app.db.repository
+os.environ["STORAGE_BACKEND"] = "memory"
+os.environ["ARCHIVE_AFTER_DAYS"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def mongo_db():
+    """A fresh in-process Mongo database (mongomock-motor)."""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    return mongomock_motor.AsyncMongoMockClient()["notes_app_test"]
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,158 @@
+# tests/test_analytics.py
+import asyncio
+import os
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.db.analytics import (InMemoryRollupStore, MongoRollupStore, plan_rebuild, rollup_increments,
+                               rollups_from_facet, rollups_from_notes)
+from app.db.repository import get_repository
+
+NOW = datetime(2026, 1, 1)
+
+
+def note(tags=("x",), content="short"):
+    return {"title": "t", "content": content, "tags": list(tags), "created_at": NOW, "updated_at": NOW}
+
+
+def test_update_moves_note_between_buckets():
+    previous = {**note(tags=["a"]), "_id": 1}
+    current = {**previous, "tags": ["b"], "updated_at": NOW}
+    increments = rollup_increments(previous, current)
+    assert increments[("tag", "a", "notes")] == -1
+    assert increments[("tag", "b", "notes")] == 1
+    assert increments[("tag", "b", "updated")] == 1
+    assert ("size", "<100", "notes") not in increments
+
+
+def test_plan_rebuild_corrects_gauges_and_keeps_event_history():
+    rebuilt = {("tag", "x", "notes"): 1, ("tag", "x", "created"): 1, ("tag", "y", "created"): 3}
+    current = {("tag", "x"): {"notes": 4, "created": 2}, ("tag", "gone"): {"notes": 2}}
+    corrections, seeds = plan_rebuild(rebuilt, current)
+    assert corrections == {("tag", "x", "notes"): -3, ("tag", "gone", "notes"): -2}
+    assert seeds == {("tag", "y", "created"): 3}
+
+
+def test_rebuild_keeps_deleted_counts_and_matches_incremental_rollups():
+    repository = get_repository("memory")
+    store = InMemoryRollupStore(repository)
+
+    async def scenario():
+        for _ in range(2):
+            created = await repository.create(note())
+            await store.record(None, created)
+        await store.record(await repository.delete(created["_id"]), None)
+        before = await store.read(days=366)
+        await store.rebuild()
+        return before, await store.read(days=366)
+
+    before, after = asyncio.run(scenario())
+    assert after == before
+    assert after["tags"] == [{"tag": "x", "created": 2, "notes": 1}]
+    assert sum(day.get("deleted", 0) for day in after["days"]) == 1
+
+
+def test_rebuild_repairs_drifted_gauges():
+    repository = get_repository("memory")
+    store = InMemoryRollupStore(repository)
+
+    async def scenario():
+        await store.record(None, await repository.create(note()))
+        await store.apply({("tag", "x", "notes"): 5})
+        await store.rebuild()
+        return await store.read(days=366)
+
+    assert asyncio.run(scenario())["tags"] == [{"tag": "x", "created": 1, "notes": 1}]
+
+
+def test_failed_rollups_do_not_fail_committed_writes(client, monkeypatch):
+    from app.routes import note_routes
+
+    created = client.post("/notes/", json={"title": "Rollup", "content": "body", "tags": []}).json()
+
+    async def fail(*args):
+        raise RuntimeError("rollups unavailable")
+
+    monkeypatch.setattr(note_routes.rollup_store, "record", fail)
+    updated = client.put(f"/notes/{created['_id']}", json={"title": "Rollup 2", "content": "body", "tags": []})
+    assert updated.status_code == 200
+    assert updated.json()["title"] == "Rollup 2"
+    assert client.delete(f"/notes/{created['_id']}").status_code == 204
+    assert client.get(f"/notes/{created['_id']}").status_code == 404
+
+
+# Notes the canned pipeline output below was derived from
+FACET_NOTES = [
+    {"title": "a", "content": "short", "tags": ["a", "b", "a"],
+     "created_at": datetime(2026, 1, 1, 9), "updated_at": datetime(2026, 1, 1, 9)},
+    {"title": "b", "content": "x" * 200, "tags": ["a"],
+     "created_at": datetime(2026, 1, 1, 10), "updated_at": datetime(2026, 1, 3, 8)},
+    {"title": "c", "content": "", "tags": [],
+     "created_at": datetime(2026, 1, 2), "updated_at": datetime(2026, 1, 2)},
+]
+FACET_RESULT = {
+    "created": [{"_id": "2026-01-01", "count": 2}, {"_id": "2026-01-02", "count": 1}],
+    "updated": [{"_id": "2026-01-03", "count": 1}],
+    "tags": [{"_id": "a", "notes": 2, "updated": 1}, {"_id": "b", "notes": 1, "updated": 0}],
+    "sizes": [{"_id": "<100", "notes": 2, "updated": 0}, {"_id": "100-1k", "notes": 1, "updated": 1}],
+}
+
+
+def test_pipeline_output_parses_to_the_same_rollups_as_the_notes():
+    assert rollups_from_facet(FACET_RESULT) == rollups_from_notes(FACET_NOTES)
+
+
+def test_mongo_rebuild_matches_the_in_memory_rebuild():
+    """Runs the real $unionWith/$facet pipeline and seeding; needs a MongoDB
+    4.4+ at MONGODB_TEST_URI (mongomock implements neither)."""
+    uri = os.getenv("MONGODB_TEST_URI")
+    if not uri:
+        pytest.skip("MONGODB_TEST_URI not set")
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from pymongo.errors import PyMongoError
+
+    # Existing history: a deletion, a larger creation count and a drifted gauge
+    history = {("day", "2026-01-01", "deleted"): 1, ("tag", "a", "created"): 5, ("tag", "a", "notes"): 9}
+
+    async def rebuild_rows(store, add_note):
+        for doc in FACET_NOTES[:2]:
+            await add_note(dict(doc), archived=False)
+        await add_note(dict(FACET_NOTES[2]), archived=True)
+        await store.apply(history)
+        await store.rebuild()
+        return sorted((kind, key, counters) for kind, key, counters in await store.rows(""))
+
+    async def mongo_scenario():
+        client = AsyncIOMotorClient(uri, serverSelectionTimeoutMS=2000)
+        db = client[f"notes_test_{uuid.uuid4().hex}"]
+        try:
+            await client.admin.command("ping")
+        except PyMongoError:
+            pytest.skip(f"no MongoDB reachable at {uri}")
+        try:
+            store = MongoRollupStore(db, db["notes"], db["notes_archive"])
+
+            async def add_note(doc, archived):
+                await (db["notes_archive"] if archived else db["notes"]).insert_one(doc)
+
+            return await rebuild_rows(store, add_note)
+        finally:
+            await client.drop_database(db.name)
+
+    async def memory_scenario():
+        repository = get_repository("memory")
+        store = InMemoryRollupStore(repository)
+
+        async def add_note(doc, archived):
+            # Archived notes count like active ones, so where they live doesn't matter here
+            await repository.create(doc)
+
+        return await rebuild_rows(store, add_note)
+
+    mongo_rows = asyncio.run(mongo_scenario())
+    memory_rows = asyncio.run(memory_scenario())
+    assert mongo_rows == memory_rows
+    tag_a = next(counters for kind, key, counters in mongo_rows if (kind, key) == ("tag", "a"))
+    assert tag_a == {"created": 5, "notes": 2, "updated": 1}
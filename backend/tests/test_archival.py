@@ -0,0 +1,66 @@
+# tests/test_archival.py
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.db.repository import notes_repository
+from app.utils.archival import archive_stale_notes
+from app.utils.related import related_index
+from app.utils.suggest import suggest_index
+
+
+def stale_note(client, days=400):
+    """Create a note through the API, then age it past the archival cutoff."""
+    title = f"Stale {uuid.uuid4().hex}"
+    created = client.post("/notes/", json={"title": title, "content": "old", "tags": ["archive-test"]}).json()
+    old = datetime.utcnow() - timedelta(days=days)
+    asyncio.run(notes_repository.update(_object_id(created), {"updated_at": old}))
+    return created
+
+
+def _object_id(note):
+    return ObjectId(note["_id"])
+
+
+def archived_ids(client):
+    active = {n["_id"] for n in client.get("/notes/", params={"limit": 1000}).json()}
+    everything = {n["_id"] for n in client.get("/notes/", params={"limit": 1000, "include_archived": True}).json()}
+    return everything - active
+
+
+def test_archival_moves_stale_notes_out_of_indexes(client):
+    note = stale_note(client)
+    assert asyncio.run(archive_stale_notes(days=365)) >= 1
+
+    assert note["_id"] in archived_ids(client)
+    assert suggest_index.suggest(note["title"])["titles"] == []
+    assert _object_id(note) not in related_index._slots
+
+
+def test_reading_an_archived_note_restores_it(client):
+    note = stale_note(client)
+    asyncio.run(archive_stale_notes(days=365))
+
+    response = client.get(f"/notes/{note['_id']}")
+    assert response.status_code == 200
+    assert note["_id"] not in archived_ids(client)
+    assert _object_id(note) in related_index._slots
+    # Just read back, so the next run leaves it alone
+    asyncio.run(archive_stale_notes(days=365))
+    assert note["_id"] not in archived_ids(client)
+
+
+def test_archived_notes_can_be_updated_and_deleted(client):
+    updated = stale_note(client)
+    deleted = stale_note(client)
+    asyncio.run(archive_stale_notes(days=365))
+
+    response = client.put(f"/notes/{updated['_id']}", json={"title": "Back", "content": "new", "tags": []})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Back"
+
+    assert client.delete(f"/notes/{deleted['_id']}").status_code == 204
+    assert client.get(f"/notes/{deleted['_id']}").status_code == 404
+    assert deleted["_id"] not in archived_ids(client)
@@ -0,0 +1,115 @@
+# tests/test_compression.py
+import asyncio
+import gzip
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.utils.compression import CompressionMiddleware, negotiate
+
+BODY = b"notes " * 500
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=0)
+
+    @app.api_route("/text", methods=["GET", "HEAD"])
+    def text():
+        return Response(BODY, media_type="text/plain")
+
+    @app.get("/empty", status_code=204)
+    def empty():
+        return Response(status_code=204)
+
+    @app.get("/not-modified")
+    def not_modified():
+        return Response(status_code=304)
+
+    @app.get("/image")
+    def image():
+        return Response(BODY, media_type="image/png")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([BODY, BODY]), media_type="text/plain")
+
+    return TestClient(app)
+
+
+def get(client, path, method="GET", encoding="gzip"):
+    return client.request(method, path, headers={"Accept-Encoding": encoding})
+
+
+def test_negotiate_prefers_highest_quality_then_server_order():
+    assert negotiate("gzip, br", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate("gzip;q=1, br;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate("*;q=0.1", ["gzip"]) == "gzip"
+    assert negotiate("identity", ["gzip"]) is None
+    assert negotiate("gzip;q=0", ["gzip"]) is None
+
+
+def test_compresses_and_sets_length_and_vary(client):
+    response = get(client, "/text")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.content == BODY
+    assert int(response.headers["content-length"]) < len(BODY)
+
+
+def test_streaming_response_is_fully_compressed(client):
+    response = get(client, "/stream")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == BODY * 2
+
+
+def test_client_without_supported_encoding_gets_identity(client):
+    response = get(client, "/text", encoding="identity")
+    assert "content-encoding" not in response.headers
+    assert response.content == BODY
+
+
+def test_small_bodies_pass_through():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    app.get("/small")(lambda: Response(b"tiny", media_type="text/plain"))
+    response = get(TestClient(app), "/small")
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_compressed_content_types_pass_through(client):
+    assert "content-encoding" not in get(client, "/image").headers
+
+
+@pytest.mark.parametrize("path", ["/empty", "/not-modified"])
+def test_bodiless_statuses_pass_through(client, path):
+    response = get(client, path)
+    assert "content-encoding" not in response.headers
+    assert response.headers.get("content-length", "0") == "0"
+    assert response.content == b""
+
+
+def test_head_keeps_the_real_content_length(client):
+    response = get(client, "/text", method="HEAD")
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-length"] == str(len(BODY))
+
+
+def test_gzip_body_is_standard_gzip():
+    sent = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": BODY})
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=0)(scope, None, send))
+    assert gzip.decompress(sent[1]["body"]) == BODY
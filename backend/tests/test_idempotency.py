@@ -0,0 +1,98 @@
+# tests/test_idempotency.py
+import asyncio
+import uuid
+
+import pytest
+
+from app.db.idempotency import InMemoryIdempotencyStore, MongoIdempotencyStore
+
+
+@pytest.fixture(params=["memory", "mongo"])
+def make_store(request):
+    if request.param == "memory":
+        return lambda lock_timeout_seconds=30: InMemoryIdempotencyStore(lock_timeout_seconds=lock_timeout_seconds)
+    collection = request.getfixturevalue("mongo_db")["idempotency_keys"]
+
+    def make(lock_timeout_seconds=30):
+        store = MongoIdempotencyStore(collection, lock_timeout_seconds=lock_timeout_seconds)
+        asyncio.run(store.ensure_indexes())
+        return store
+    return make
+
+
+def test_first_claim_owns_the_key(make_store):
+    store = make_store()
+    assert asyncio.run(store.claim("k", "fp")) is None
+    existing = asyncio.run(store.claim("k", "fp"))
+    assert existing["fingerprint"] == "fp"
+    assert existing["status_code"] is None
+
+
+def test_completed_key_replays_the_response(make_store):
+    store = make_store()
+    asyncio.run(store.claim("k", "fp"))
+    asyncio.run(store.complete("k", 201, {"title": "t"}))
+    existing = asyncio.run(store.claim("k", "fp"))
+    assert (existing["status_code"], existing["body"]) == (201, {"title": "t"})
+
+
+def test_release_lets_a_retry_claim_again(make_store):
+    store = make_store()
+    asyncio.run(store.claim("k", "fp"))
+    asyncio.run(store.release("k"))
+    assert asyncio.run(store.claim("k", "fp")) is None
+
+
+def test_release_keeps_completed_keys(make_store):
+    store = make_store()
+    asyncio.run(store.claim("k", "fp"))
+    asyncio.run(store.complete("k", 201, {}))
+    asyncio.run(store.release("k"))
+    assert asyncio.run(store.claim("k", "fp"))["status_code"] == 201
+
+
+def test_abandoned_claim_is_taken_over_after_lock_timeout(make_store):
+    store = make_store(lock_timeout_seconds=0)
+    asyncio.run(store.claim("k", "first"))
+    assert asyncio.run(store.claim("k", "second")) is None
+    asyncio.run(store.complete("k", 201, {}))
+    # Completed keys are never taken over
+    assert asyncio.run(store.claim("k", "third"))["fingerprint"] == "second"
+
+
+def post_note(client, key, title="Idempotent"):
+    return client.post("/notes/", json={"title": title, "content": "body", "tags": []},
+                       headers={"Idempotency-Key": key})
+
+
+def test_retry_replays_the_created_note(client):
+    key = str(uuid.uuid4())
+    first = post_note(client, key)
+    retry = post_note(client, key)
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+
+
+def test_reused_key_with_another_body_is_rejected(client):
+    key = str(uuid.uuid4())
+    post_note(client, key)
+    assert post_note(client, key, title="Different").status_code == 422
+
+
+def test_failed_bookkeeping_does_not_duplicate_the_note(client, monkeypatch):
+    from app.routes import note_routes
+
+    async def fail(*args):
+        raise RuntimeError("rollups unavailable")
+
+    monkeypatch.setattr(note_routes.rollup_store, "record", fail)
+    key = str(uuid.uuid4())
+    title = f"Once {key}"
+    first = post_note(client, key, title)
+    retry = post_note(client, key, title)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json()["_id"] == first.json()["_id"]
+    notes = client.get("/notes/", params={"q": key}).json()
+    assert [n["_id"] for n in notes] == [first.json()["_id"]]
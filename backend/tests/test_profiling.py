@@ -0,0 +1,105 @@
+# tests/test_profiling.py
+import json
+import logging
+import time
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.routes import admin_routes
+from app.routes.admin_routes import router as admin_router
+from app.routes.note_routes import router as note_router
+from app.utils import profiling
+from app.utils.profiling import SamplingProfiler, finish_request, start_request, validate
+
+NOTE = {"title": "Profiled", "content": "body", "tags": ["p"]}
+
+
+@pytest.fixture
+def client():
+    """The notes and admin routes behind the PROFILING_ENABLED middleware."""
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def profile_requests(request: Request, call_next):
+        timings = start_request()
+        response = await call_next(request)
+        finish_request(timings, request, response)
+        return response
+
+    app.include_router(note_router)
+    app.include_router(admin_router)
+    return TestClient(app)
+
+
+def phases(response):
+    return {entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")}
+
+
+def test_server_timing_reports_every_phase(client):
+    response = client.post("/notes/", json=NOTE)
+    assert response.status_code == 201
+    assert phases(response) == {"parse", "db", "validate", "encode", "total"}
+
+
+def test_slow_requests_are_logged(client, monkeypatch, caplog):
+    monkeypatch.setattr(profiling, "SLOW_REQUEST_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="notes.profiling"):
+        client.get("/notes/")
+    entry = json.loads(caplog.records[-1].getMessage())
+    assert entry["event"] == "slow_request"
+    assert entry["path"] == "/notes/"
+    assert entry["status"] == 200
+    assert "db" in entry["phases_ms"]
+
+
+def test_validate_is_a_no_op_outside_profiled_requests():
+    doc = {"_id": "not validated"}
+    assert validate(object, doc) is doc
+
+
+@pytest.mark.parametrize("path", ["/admin/profiler", "/admin/profiler/start", "/admin/profiler/stop"])
+@pytest.mark.parametrize("token", [None, "wrong", "secret-but-longer"])
+def test_admin_requires_the_token(client, monkeypatch, path, token):
+    monkeypatch.setattr(admin_routes, "ADMIN_TOKEN", "secret")
+    method = client.get if path == "/admin/profiler" else client.post
+    headers = {"X-Admin-Token": token} if token is not None else {}
+    assert method(path, headers=headers).status_code == 403
+
+
+def test_admin_is_disabled_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(admin_routes, "ADMIN_TOKEN", None)
+    assert client.get("/admin/profiler", headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_admin_profiler_start_clamps_interval(client, monkeypatch):
+    monkeypatch.setattr(admin_routes, "ADMIN_TOKEN", "secret")
+    headers = {"X-Admin-Token": "secret"}
+    try:
+        started = client.post("/admin/profiler/start", params={"interval_ms": 0}, headers=headers)
+        assert started.status_code == 200
+        assert started.json()["interval_ms"] == profiling.MIN_SAMPLING_INTERVAL_MS
+    finally:
+        stopped = client.post("/admin/profiler/stop", headers=headers)
+    assert stopped.json()["running"] is False
+
+
+def test_sampling_profiler_collects_stacks():
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    deadline = time.monotonic() + 2
+    while profiler.report()["samples"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    profiler.stop()
+
+    report = profiler.report(limit=5)
+    assert report["running"] is False
+    assert report["samples"] >= 3
+    assert report["top_stacks"]
+    assert any("test_sampling_profiler_collects_stacks" in entry["stack"] for entry in report["top_stacks"])
+
+
+def test_suggest_is_profiled(client):
+    response = client.get("/notes/suggest", params={"prefix": "p"})
+    assert {"parse", "encode", "total"} <= phases(response)
@@ -0,0 +1,187 @@
+# tests/test_related.py
+import asyncio
+
+import numpy as np
+import pytest
+from bson import ObjectId
+
+from app.utils.related import RelatedIndex, note_features
+
+N_FEATURES = 2 ** 12
+
+
+def make_note(content, title="", tags=()):
+    return {"_id": ObjectId(), "title": title, "content": content, "tags": list(tags)}
+
+
+@pytest.fixture
+def notes():
+    return {
+        "query": make_note("apple banana cherry"),
+        "twin": make_note("apple banana cherry"),
+        "close": make_note("apple banana durian"),
+        "far": make_note("apple kiwi lemon mango"),
+        "unrelated": make_note("zebra yak walrus"),
+    }
+
+
+def build(notes, merge_every=1024):
+    index = RelatedIndex(n_features=N_FEATURES, merge_every=merge_every)
+    index.build(list(notes.values()))
+    return index
+
+
+def ranked_ids(index, note, limit=10):
+    return [note_id for note_id, _ in index.related(note, limit)]
+
+
+def brute_force(index, notes, query):
+    """Cosine similarity over dense IDF-weighted vectors."""
+    def vector(note):
+        dense = np.zeros(N_FEATURES)
+        indices, values = note_features(note, N_FEATURES)
+        dense[indices] = values * index._idf[indices]
+        return dense
+    q = vector(query)
+    scores = {}
+    for note in notes:
+        if note["_id"] == query["_id"]:
+            continue
+        v = vector(note)
+        score = q @ v / (np.linalg.norm(q) * np.linalg.norm(v))
+        if score > 0:
+            scores[note["_id"]] = score
+    return scores
+
+
+def test_results_are_ordered_by_cosine_similarity(notes):
+    index = build(notes)
+    results = index.related(notes["query"], 10)
+    assert [note_id for note_id, _ in results] == [notes["twin"]["_id"], notes["close"]["_id"], notes["far"]["_id"]]
+    assert results[0][1] == pytest.approx(1.0, rel=1e-5)
+    expected = brute_force(index, notes.values(), notes["query"])
+    for note_id, score in results:
+        assert score == pytest.approx(expected[note_id], rel=1e-4)
+
+
+def test_limit_and_unrelated_notes(notes):
+    index = build(notes)
+    assert ranked_ids(index, notes["query"], limit=1) == [notes["twin"]["_id"]]
+    assert notes["unrelated"]["_id"] not in ranked_ids(index, notes["query"])
+    assert index.related(make_note("nothing matches here at all"), 5) == []
+
+
+def test_note_itself_is_excluded(notes):
+    index = build(notes)
+    assert notes["query"]["_id"] not in ranked_ids(index, notes["query"])
+    # Also while the note is still in the pending buffer
+    extra = make_note("apple banana cherry")
+    index.add(extra)
+    assert extra["_id"] not in ranked_ids(index, extra)
+    assert extra["_id"] in ranked_ids(index, notes["query"])
+
+
+def test_remove_tombstones_the_row(notes):
+    index = build(notes)
+    slot = index._slots[notes["twin"]["_id"]]
+    index.remove(notes["twin"])
+    assert not index._alive[slot]
+    assert len(index) == 4
+    assert notes["twin"]["_id"] not in ranked_ids(index, notes["query"])
+    # Removing twice is a no-op
+    index.remove(notes["twin"])
+    assert len(index) == 4
+
+
+def test_update_replaces_the_old_row(notes):
+    index = build(notes)
+    previous = notes["close"]
+    current = {**previous, "content": "zebra yak"}
+    old_slot = index._slots[previous["_id"]]
+    index.update(previous, current)
+
+    assert not index._alive[old_slot]
+    assert index._slots[previous["_id"]] != old_slot
+    assert previous["_id"] not in ranked_ids(index, notes["query"])
+    assert ranked_ids(index, notes["unrelated"])[0] == previous["_id"]
+    assert len(index) == 5
+
+
+def test_merge_drops_dead_rows_and_keeps_slots_consistent(notes):
+    index = build(notes, merge_every=4)
+    index.remove(notes["far"])
+    index.update(notes["close"], {**notes["close"], "content": "apple banana cherry durian"})
+    before = index.related(notes["query"], 10)
+    extra = make_note("banana cherry")
+    # Fourth write since the build (update is two) triggers a merge
+    index.add(extra)
+
+    assert index._pending == []
+    assert index._base.shape[0] == len(index._ids) == len(index) == 5
+    assert all(index._alive[:len(index._ids)])
+    assert {note_id: slot for slot, note_id in enumerate(index._ids)} == index._slots
+    assert notes["far"]["_id"] not in index._slots
+
+    after = dict(index.related(notes["query"], 10))
+    for note_id, score in before:
+        assert after[note_id] == pytest.approx(score, rel=0.2)
+    assert extra["_id"] in after
+
+
+def test_build_skips_duplicate_ids(notes):
+    index = RelatedIndex(n_features=N_FEATURES)
+    index.build(list(notes.values()) + [notes["twin"]])
+    assert len(index) == len(notes)
+
+
+def test_merge_runs_off_the_event_loop_and_keeps_concurrent_writes(notes):
+    index = build(notes, merge_every=2)
+
+    async def scenario():
+        first = make_note("apple banana")
+        index.add(first)
+        index.remove(notes["unrelated"])
+        # The merge is in flight; these writes land in the live index meanwhile
+        merging = index._merging
+        assert merging is not None
+        during = make_note("apple banana cherry kiwi")
+        index.add(during)
+        index.remove(notes["twin"])
+        await merging
+        await asyncio.sleep(0)
+        return first, during
+
+    first, during = asyncio.run(scenario())
+
+    assert index._merging is None
+    assert index._base.shape[0] == 5
+    assert len(index._pending) == 1
+    assert len(index) == 5
+    assert {note_id: slot for slot, note_id in enumerate(index._ids) if index._alive[slot]} == index._slots
+    ranked = ranked_ids(index, notes["query"])
+    assert notes["twin"]["_id"] not in ranked
+    assert first["_id"] in ranked and during["_id"] in ranked
+
+
+def test_build_discards_a_merge_in_flight(notes):
+    index = build(notes, merge_every=1)
+
+    async def scenario():
+        index.add(make_note("apple"))
+        merging = index._merging
+        index.build(list(notes.values()))
+        await merging
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert len(index._ids) == len(index) == len(notes)
+
+
+def test_slot_arrays_grow_geometrically():
+    index = RelatedIndex(n_features=N_FEATURES, merge_every=10 ** 6)
+    capacities = set()
+    for i in range(1000):
+        index.add(make_note(f"word{i}"))
+        capacities.add(len(index._alive))
+    assert len(index._alive) >= len(index._ids) == 1000
+    assert len(capacities) <= 8
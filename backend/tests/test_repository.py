@@ -0,0 +1,146 @@
+# tests/test_repository.py
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.db.repository import get_repository
+
+NOW = datetime(2026, 1, 1)
+CUTOFF = NOW - timedelta(days=30)
+
+
+@pytest.fixture(params=["memory", "mongo"])
+def repository(request):
+    if request.param == "memory":
+        return get_repository("memory")
+    from app.db.mongo_repository import MongoNoteRepository
+    db = request.getfixturevalue("mongo_db")
+    return MongoNoteRepository(db["notes"], db["notes_archive"])
+
+
+def note(title="Note", updated_at=NOW, **fields):
+    return {"title": title, "content": f"{title} body", "tags": ["t"],
+            "created_at": updated_at, "updated_at": updated_at, **fields}
+
+
+def create(repository, **fields):
+    return asyncio.run(repository.create(note(**fields)))
+
+
+def titles(notes):
+    return sorted(doc["title"] for doc in notes)
+
+
+def test_update_returns_previous_and_updated(repository):
+    created = create(repository, title="Before")
+    previous, updated = asyncio.run(repository.update(created["_id"], {"title": "After"}))
+    assert previous["title"] == "Before"
+    assert updated["title"] == "After"
+    assert updated["content"] == created["content"]
+    assert asyncio.run(repository.get(created["_id"]))["title"] == "After"
+
+
+def test_update_and_delete_missing_note(repository):
+    assert asyncio.run(repository.update(ObjectId(), {"title": "x"})) is None
+    assert asyncio.run(repository.delete(ObjectId())) is None
+
+
+def test_delete_returns_the_note_once(repository):
+    created = create(repository)
+    assert asyncio.run(repository.delete(created["_id"]))["_id"] == created["_id"]
+    assert asyncio.run(repository.delete(created["_id"])) is None
+    assert asyncio.run(repository.get(created["_id"])) is None
+
+
+def test_archive_stale_moves_only_stale_notes(repository):
+    create(repository, title="Old", updated_at=NOW - timedelta(days=60))
+    create(repository, title="Fresh", updated_at=NOW)
+
+    moved = asyncio.run(repository.archive_stale(CUTOFF))
+
+    assert titles(moved) == ["Old"]
+    assert titles(asyncio.run(repository.list_notes())) == ["Fresh"]
+    assert titles(asyncio.run(repository.list_notes(include_archived=True))) == ["Fresh", "Old"]
+    assert asyncio.run(repository.archive_stale(CUTOFF)) == []
+
+
+def test_archive_stale_respects_batch_size(repository):
+    for day in range(5):
+        create(repository, title=f"Old {day}", updated_at=NOW - timedelta(days=60 + day))
+    first = asyncio.run(repository.archive_stale(CUTOFF, batch_size=2))
+    # Oldest first
+    assert titles(first) == ["Old 3", "Old 4"]
+    assert len(asyncio.run(repository.archive_stale(CUTOFF, batch_size=10))) == 3
+
+
+def test_restore_promotes_once_and_protects_from_rearchival(repository):
+    created = create(repository, updated_at=NOW - timedelta(days=60))
+    asyncio.run(repository.archive_stale(CUTOFF))
+    assert asyncio.run(repository.get(created["_id"])) is None
+
+    restored = asyncio.run(repository.restore(created["_id"]))
+    assert restored["_id"] == created["_id"]
+    assert restored["promoted_at"] >= CUTOFF
+    assert asyncio.run(repository.restore(created["_id"])) is None
+    assert asyncio.run(repository.get(created["_id"])) is not None
+
+    # Recently read back, so not stale yet even though updated_at is old
+    assert asyncio.run(repository.archive_stale(CUTOFF)) == []
+
+
+def test_delete_archived(repository):
+    created = create(repository, updated_at=NOW - timedelta(days=60))
+    asyncio.run(repository.archive_stale(CUTOFF))
+    assert asyncio.run(repository.delete(created["_id"])) is None
+    assert asyncio.run(repository.delete_archived(created["_id"]))["_id"] == created["_id"]
+    assert asyncio.run(repository.delete_archived(created["_id"])) is None
+    assert asyncio.run(repository.restore(created["_id"])) is None
+
+
+def mongo_repository(mongo_db):
+    from app.db.mongo_repository import MongoNoteRepository
+    return MongoNoteRepository(mongo_db["notes"], mongo_db["notes_archive"])
+
+
+def test_mongo_archive_stale_skips_notes_changed_mid_run(mongo_db):
+    repository = mongo_repository(mongo_db)
+    deleted = create(repository, title="Deleted", updated_at=NOW - timedelta(days=60))
+    updated = create(repository, title="Updated", updated_at=NOW - timedelta(days=61))
+    kept = create(repository, title="Kept", updated_at=NOW - timedelta(days=62))
+
+    replace_one = repository.archive.replace_one
+
+    async def write_concurrently(filter_, *args, **kwargs):
+        # A user writes to the note between its archive copy and its removal
+        result = await replace_one(filter_, *args, **kwargs)
+        if filter_["_id"] == deleted["_id"]:
+            await repository.delete(deleted["_id"])
+        elif filter_["_id"] == updated["_id"]:
+            await repository.update(updated["_id"], {"updated_at": NOW})
+        return result
+
+    repository.archive.replace_one = write_concurrently
+    moved = asyncio.run(repository.archive_stale(CUTOFF))
+
+    assert titles(moved) == ["Kept"]
+    assert asyncio.run(repository.restore(deleted["_id"])) is None
+    assert asyncio.run(repository.get(deleted["_id"])) is None
+    assert asyncio.run(repository.restore(updated["_id"])) is None
+    assert asyncio.run(repository.get(updated["_id"]))["title"] == "Updated"
+    assert asyncio.run(repository.restore(kept["_id"]))["title"] == "Kept"
+
+
+def test_mongo_archive_stale_keeps_note_when_archive_write_fails(mongo_db):
+    repository = mongo_repository(mongo_db)
+    created = create(repository, updated_at=NOW - timedelta(days=60))
+
+    async def fail(*args, **kwargs):
+        raise RuntimeError("archive unavailable")
+
+    repository.archive.replace_one = fail
+    with pytest.raises(RuntimeError):
+        asyncio.run(repository.archive_stale(CUTOFF))
+
+    assert asyncio.run(repository.get(created["_id"]))["_id"] == created["_id"]
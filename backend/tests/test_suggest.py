@@ -0,0 +1,75 @@
+# tests/test_suggest.py
+import uuid
+
+from app.utils.suggest import PrefixIndex, SuggestIndex
+
+
+def texts(results):
+    return [result["text"] for result in results]
+
+
+def test_prefix_matches_are_ranked_by_count():
+    index = PrefixIndex()
+    for term in ["Meeting", "Memo", "Memo", "memo ", "Menu", "Other"]:
+        index.add(term)
+    results = index.suggest("ME")
+    assert texts(results) == ["Memo", "Meeting", "Menu"]
+    assert results[0]["count"] == 3
+    assert texts(index.suggest("me", limit=1)) == ["Memo"]
+    assert index.suggest("x") == []
+
+
+def test_remove_drops_a_term_when_its_count_reaches_zero():
+    index = PrefixIndex()
+    index.add("Plan")
+    index.add("Plan")
+    index.remove("plan")
+    assert index.suggest("pl") == [{"text": "Plan", "count": 1}]
+    index.remove("Plan")
+    assert index.suggest("pl") == []
+    assert len(index) == 0
+    # Removing an unknown term is a no-op
+    index.remove("Plan")
+
+
+def test_max_terms_cap_is_enforced():
+    index = PrefixIndex(max_terms=2)
+    for term in ["alpha", "beta", "gamma"]:
+        index.add(term)
+    assert len(index) == 2
+    assert index.suggest("gamma") == []
+    # Known terms still count, and freed slots are reused
+    index.add("alpha")
+    assert index.suggest("alpha")[0]["count"] == 2
+    index.remove("beta")
+    index.add("gamma")
+    assert texts(index.suggest("g")) == ["gamma"]
+
+
+def test_suggest_index_covers_titles_and_tags():
+    index = SuggestIndex()
+    index.add_note({"title": "Groceries", "tags": ["home", "home", "hobby"]})
+    assert index.suggest("ho") == {"titles": [], "tags": [{"text": "hobby", "count": 1},
+                                                          {"text": "home", "count": 1}]}
+    assert texts(index.suggest("gro")["titles"]) == ["Groceries"]
+    index.remove_note({"title": "Groceries", "tags": ["home", "hobby"]})
+    assert index.suggest("") == {"titles": [], "tags": []}
+
+
+def test_write_handlers_keep_suggestions_current(client):
+    word = uuid.uuid4().hex
+    note = {"title": f"{word} draft", "content": "body", "tags": [f"{word}-tag"]}
+    created = client.post("/notes/", json=note).json()
+
+    def suggest():
+        return client.get("/notes/suggest", params={"prefix": word}).json()
+
+    assert texts(suggest()["titles"]) == [f"{word} draft"]
+    assert texts(suggest()["tags"]) == [f"{word}-tag"]
+
+    client.put(f"/notes/{created['_id']}", json={**note, "title": f"{word} final", "tags": []})
+    assert texts(suggest()["titles"]) == [f"{word} final"]
+    assert suggest()["tags"] == []
+
+    client.delete(f"/notes/{created['_id']}")
+    assert suggest() == {"titles": [], "tags": []}
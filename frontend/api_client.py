@@ -0,0 +1,155 @@
+# Backend API client with timeouts, retries and a circuit breaker
+import logging
+import random
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+import requests
+
+from config import (
+    API_BASE_URL,
+    API_CONNECT_TIMEOUT,
+    API_READ_TIMEOUT,
+    API_MAX_RETRIES,
+    API_BACKOFF_BASE,
+    API_BACKOFF_MAX,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+)
+
+logger = logging.getLogger("notes_frontend.api")
+
+# Safe to repeat; POST is only retried when it carries an Idempotency-Key
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+# The backend answers 409 while the first request with the same
+# Idempotency-Key is still running; a later retry gets its stored response
+IDEMPOTENT_RETRY_STATUS_CODES = RETRY_STATUS_CODES | {409}
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised without touching the network while the backend is marked down."""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures, then lets a
+    single trial request through once `reset_timeout` seconds have passed."""
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class ApiClient:
+    """Thin wrapper over a shared `requests.Session` for the notes API."""
+
+    def __init__(self, base_url: str = API_BASE_URL,
+                 connect_timeout: float = API_CONNECT_TIMEOUT,
+                 read_timeout: float = API_READ_TIMEOUT,
+                 max_retries: int = API_MAX_RETRIES,
+                 backoff_base: float = API_BACKOFF_BASE,
+                 backoff_max: float = API_BACKOFF_MAX,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+
+    def url_for(self, endpoint: str = "") -> str:
+        # Keep the trailing slash on the base URL to avoid 307 redirects
+        if endpoint:
+            return f"{self.base_url.rstrip('/')}/{endpoint}"
+        return self.base_url
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given retry number (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request(self, method: str, endpoint: str = "", data: Dict = None,
+                headers: Dict = None) -> requests.Response:
+        method = method.upper()
+        url = self.url_for(endpoint)
+        headers = dict(headers or {})
+        if method == "POST":
+            headers.setdefault("Idempotency-Key", str(uuid.uuid4()))
+        retryable = method in IDEMPOTENT_METHODS or "Idempotency-Key" in headers
+        retry_statuses = IDEMPOTENT_RETRY_STATUS_CODES if "Idempotency-Key" in headers else RETRY_STATUS_CODES
+        attempts = 1 + (self.max_retries if retryable else 0)
+
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                logger.warning("%s %s short-circuited: backend marked unavailable", method, url)
+                raise CircuitOpenError(f"Backend unavailable, not calling {method} {url}")
+
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, json=data, headers=headers,
+                                                timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                # Any failure must be recorded, or a half-open trial never ends
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                logger.warning("%s %s failed after %.1f ms (attempt %d/%d): %s",
+                               method, url, elapsed_ms, attempt + 1, attempts, e)
+                self.breaker.record_failure()
+                transient = isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+                if not transient or attempt + 1 >= attempts:
+                    raise
+            else:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                logger.info("%s %s -> %d in %.1f ms, %s bytes %s (attempt %d/%d)",
+                            method, url, response.status_code, elapsed_ms,
+                            response.headers.get("Content-Length", "?"),
+                            response.headers.get("Content-Encoding", "identity"), attempt + 1, attempts)
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if response.status_code not in retry_statuses or attempt + 1 >= attempts:
+                    return response
+
+            time.sleep(self.backoff(attempt))
+
+
+# Shared by every Streamlit session so they all see the same breaker state
+api_client = ApiClient()
@@ -1,5 +1,6 @@
 import streamlit as st
 import requests
+from api_client import api_client
 import json
 from datetime import datetime
 import time
@@ -103,30 +104,10 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# API Configuration
-API_BASE_URL = "http://localhost:8000/notes/"
-
 def make_api_request(method: str, endpoint: str = "", data: Dict = None) -> Dict:
     """Make API request to the backend"""
-    # Build URL properly to avoid redirects
-    if endpoint:
-        url = f"{API_BASE_URL.rstrip('/')}/{endpoint}"
-    else:
-        url = API_BASE_URL  # Keep the trailing slash for the base URL
-    
-    # Debug: Print the URL being called
-    print(f"DEBUG: Making {method} request to: {url}")
-    
     try:
-        if method == "GET":
-            response = requests.get(url)
-        elif method == "POST":
-            response = requests.post(url, json=data)
-        elif method == "PUT":
-            response = requests.put(url, json=data)
-        elif method == "DELETE":
-            response = requests.delete(url)
-        
+        response = api_client.request(method, endpoint, data=data)
         response.raise_for_status()
         return {"success": True, "data": response.json() if response.content else None}
     except requests.exceptions.RequestException as e:
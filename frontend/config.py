@@ -7,6 +7,16 @@ load_dotenv()
 
 # API Configuration
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000/notes/")
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "3.05"))  # seconds
+API_READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "10"))  # seconds
+API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "2"))  # extra attempts for idempotent calls
+API_BACKOFF_BASE = float(os.getenv("API_BACKOFF_BASE", "0.2"))  # seconds
+API_BACKOFF_MAX = float(os.getenv("API_BACKOFF_MAX", "2"))  # seconds
+
+# Circuit breaker: fail fast after this many consecutive failures...
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+# ...and try the backend again after this many seconds
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "15"))
 
 # Streamlit Configuration
 STREAMLIT_SERVER_PORT = int(os.getenv("STREAMLIT_SERVER_PORT", "8501"))
@@ -0,0 +1,107 @@
+# Tests for the backend API client (no network: the session is stubbed)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import requests
+
+from api_client import ApiClient, CircuitBreaker, CircuitOpenError
+
+
+class FakeSession:
+    """Stands in for requests.Session, replaying canned outcomes in order."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = requests.Response()
+        response.status_code = outcome
+        return response
+
+
+def make_client(*outcomes, max_retries=2, failure_threshold=3, reset_timeout=60.0):
+    client = ApiClient(max_retries=max_retries, backoff_base=0, backoff_max=0,
+                       breaker=CircuitBreaker(failure_threshold, reset_timeout))
+    client.session = FakeSession(*outcomes)
+    return client
+
+
+def test_get_is_retried_on_connection_errors_and_retryable_statuses():
+    client = make_client(requests.exceptions.ConnectionError(), 503, 200)
+    assert client.request("GET").status_code == 200
+    assert len(client.session.calls) == 3
+
+
+def test_post_reuses_one_idempotency_key_across_retries():
+    client = make_client(requests.exceptions.Timeout(), 201)
+    assert client.request("POST", data={"title": "t"}).status_code == 201
+    keys = {kwargs["headers"]["Idempotency-Key"] for _, _, kwargs in client.session.calls}
+    assert len(keys) == 1
+
+
+def test_post_retries_while_the_first_attempt_is_in_progress():
+    client = make_client(requests.exceptions.ReadTimeout(), 409, 201)
+    assert client.request("POST", data={"title": "t"}).status_code == 201
+    assert len(client.session.calls) == 3
+
+
+def test_conflict_is_final_without_an_idempotency_key():
+    client = make_client(409, 200)
+    assert client.request("PUT", data={"title": "t"}).status_code == 409
+    assert len(client.session.calls) == 1
+
+
+def test_non_transient_errors_are_not_retried():
+    client = make_client(requests.exceptions.ChunkedEncodingError(), 200)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        client.request("GET")
+    assert len(client.session.calls) == 1
+
+
+def test_breaker_opens_after_consecutive_failures():
+    client = make_client(*[requests.exceptions.ConnectionError()] * 3, max_retries=0)
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.request("GET")
+    assert client.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        client.request("GET")
+    assert len(client.session.calls) == 3
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+@pytest.mark.parametrize("error", [requests.exceptions.ChunkedEncodingError(),
+                                   requests.exceptions.ContentDecodingError(),
+                                   requests.exceptions.ConnectionError()])
+def test_failed_trial_reopens_the_circuit(error):
+    client = make_client(error, 200, max_retries=0, failure_threshold=1, reset_timeout=0.0)
+    client.breaker.record_failure()
+    with pytest.raises(type(error)):
+        client.request("GET")
+    # The trial finished, so the next call gets its own trial instead of
+    # being short-circuited forever
+    assert client.request("GET").status_code == 200
+    assert client.breaker.state == "closed"
+
+
+def test_server_errors_count_as_failures():
+    client = make_client(500, max_retries=0, failure_threshold=1)
+    assert client.request("GET").status_code == 500
+    assert client.breaker.state == "open"